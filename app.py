@@ -0,0 +1,559 @@
+from dash import Dash, dcc, html, Input, Output, ClientsideFunction
+from dash.exceptions import PreventUpdate
+from flask import Response, g, request
+import functools
+import hmac
+import os
+import time
+
+# Dash serializes every response with plotly's encoder, which looks pandas up in sys.modules;
+# importing it up front means the encoder never sees the half-imported module of the loader thread
+import pandas  # noqa: F401
+
+import utils
+
+# Initialize the Dash app
+app = Dash(__name__)
+
+# Optional mode that ships a compact dataset to the browser and runs the callbacks there
+CLIENTSIDE_MODE = os.environ.get("BOWLING_CLIENTSIDE", "0") == "1"
+
+# Generated figures, keyed by data version so a reload never serves stale graphs
+figure_cache = utils.figure_cache.FigureCache(maxsize=int(os.environ.get("BOWLING_FIGURE_CACHE_SIZE", 128)))
+
+# Under the multi-worker server (see gunicorn.conf.py) the leader publishes the prepared data
+# and every worker maps it read-only; on its own the app loads and refreshes the data itself
+SHARED_DATA_DIR = os.environ.get("BOWLING_SHARED_DATA_DIR")
+
+# Optional SQLite history store (utils/history.py). The sheet is persisted there, the graphs query
+# it instead of keeping the prepared history in memory, and it is the fallback when Sheets is down.
+HISTORY_DB = os.environ.get("BOWLING_HISTORY_DB")
+
+# Shared secret for POST /refresh, unset leaves the endpoint open (it is still rate limited)
+REFRESH_TOKEN = os.environ.get("BOWLING_REFRESH_TOKEN")
+
+if SHARED_DATA_DIR:
+    refresher = utils.shared_data.SharedDataReader(SHARED_DATA_DIR, on_refresh=lambda data: figure_cache.invalidate(data.version))
+else:
+    # Prepared data lives in the refresher; it is re-fetched in the background and swapped atomically
+    # The sheet client is only imported once the background thread makes the first load
+    load = utils.sheets.load_raw_data
+    prepare_options = {}
+    if HISTORY_DB:
+        history = utils.history.HistoryStore(HISTORY_DB)
+        load = history.loader(load)
+        # The clientside payload is built from the full prepared data, there the store is only the source
+        if not CLIENTSIDE_MODE:
+            prepare_options = {"prepare": history.prepare, "keep_raw": False}
+    refresher = utils.refresh.DataRefresher(load, interval=float(os.environ.get("BOWLING_REFRESH_SECONDS", 600)),
+                                            on_refresh=lambda data: figure_cache.invalidate(data.version), **prepare_options)
+# The first load happens in the background, the page is served right away and fills in when it is done
+refresher.start()
+
+
+# Trigger a refresh without waiting for the interval, e.g. right after a game night. With
+# BOWLING_REFRESH_TOKEN set the request needs "Authorization: Bearer <token>"; triggers while one
+# is pending or right after a refresh are refused (see utils.refresh.MIN_TRIGGER_SECONDS).
+@app.server.route("/refresh", methods=["POST"])
+def trigger_refresh():
+    if REFRESH_TOKEN and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {REFRESH_TOKEN}"):
+        return {"error": "invalid refresh token"}, 403
+    triggered = refresher.trigger()
+    data = refresher.current
+    version = data.version if data else None
+    if not triggered:
+        return {"error": "a refresh is pending or was just made", "version": version}, 429
+    return {"version": version}
+
+
+# 200 once the first dataset is prepared, 503 while it is still loading
+@app.server.route("/ready")
+def ready():
+    data = refresher.current
+    if data is None:
+        return {"ready": False, "version": None}, 503
+    return {"ready": True, "version": data.version}
+
+
+# Hit, miss and eviction counters of the figure cache
+@app.server.route("/figure-cache")
+def figure_cache_stats():
+    return figure_cache.stats()
+
+
+# Time every HTTP request, this includes serializing the Dash callback responses
+@app.server.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.server.after_request
+def observe_request(response):
+    if "request_start" in g:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        utils.metrics.REGISTRY.histogram("bowling_http_request_seconds", "HTTP request latency").observe(
+            time.perf_counter() - g.request_start, route=route, method=request.method)
+    return response
+
+
+def collect_app_metrics():
+    stats = figure_cache.stats()
+    data = refresher.current
+    return [
+        ("bowling_figure_cache_hits_total", "counter", "Figure cache hits", [({}, stats["hits"])]),
+        ("bowling_figure_cache_misses_total", "counter", "Figure cache misses", [({}, stats["misses"])]),
+        ("bowling_figure_cache_evictions_total", "counter", "Figure cache evictions", [({}, stats["evictions"])]),
+        ("bowling_figure_cache_entries", "gauge", "Figures currently cached", [({}, stats["size"])]),
+        ("bowling_data_version", "gauge", "Version of the prepared data being served", [({}, data.version if data else 0)]),
+        ("bowling_score_mismatches", "gauge", "Games whose sheet total their frame results rule out",
+         [({}, len(data.get("score_mismatches", ())) if data else 0)]),
+    ]
+
+utils.metrics.REGISTRY.register_collector(collect_app_metrics)
+
+
+# Prometheus scrape endpoint
+@app.server.route("/metrics")
+def metrics():
+    return Response(utils.metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+# With BOWLING_PROFILE=1, POST /profile profiles the next callback, GET /profile shows the report
+PROFILE_MODE = os.environ.get("BOWLING_PROFILE", "0") == "1"
+
+@app.server.route("/profile", methods=["GET", "POST"])
+def profile():
+    if not PROFILE_MODE:
+        return Response("Profiling is disabled, set BOWLING_PROFILE=1\n", status=404, mimetype="text/plain")
+    if request.method == "POST":
+        utils.metrics.PROFILER.arm()
+        return Response("The next callback will be profiled\n", mimetype="text/plain")
+    return Response(utils.metrics.PROFILER.last_report or "No profile yet\n", mimetype="text/plain")
+
+
+# Result distribution animated over the game days, as a standalone page; ?player= for one player.
+# Every step is a row of the cumulative count tables the date-range statistics keep anyway.
+@app.server.route("/export/result-distribution")
+def export_result_distribution():
+    data = refresher.current
+    if data is None:
+        return Response("Data is still loading\n", status=503, mimetype="text/plain")
+    ranges = data["ranges"]
+    player = request.args.get("player")
+    if player is not None and player not in data["player_summary"].index:
+        return Response(f"Unknown player {player}\n", status=404, mimetype="text/plain")
+    title = "Distribution of Round Results" if player is None else f"Distribution of Round Results for Player {player}"
+    fig = utils.graph_team.generate_result_distribution_animation(ranges.days, ranges.cumulative_result_counts(player), title)
+    return Response(fig.to_html(include_plotlyjs="cdn"), mimetype="text/html")
+
+
+# Clientside payload of the current data version, built once per version
+_client_payload = {"version": None, "payload": None, "bytes": 0}
+
+def client_payload():
+    data = refresher.current
+    if data is None or data.get("df") is None:
+        return None
+    if _client_payload["version"] != data.version:
+        payload = utils.client_data.build_payload(data)
+        _client_payload.update(version=data.version, payload=payload, bytes=utils.client_data.payload_size(payload))
+    return _client_payload["payload"]
+
+
+# Size of the payload shipped to the browser in clientside mode
+@app.server.route("/client-data/stats")
+def client_data_stats():
+    client_payload()
+    return {"version": _client_payload["version"], "bytes": _client_payload["bytes"]}
+
+
+# In clientside mode the four graphs always exist and the browser fills in their figures
+def client_graphs():
+    return [dcc.Graph(id=f'client-graph-{i}', style={'display': 'none'}) for i in range(4)]
+
+
+LOADING_TEXT = "Loading data..."
+
+
+# Content of the Last Game Data box
+def last_game_children(data):
+    if data is None:
+        return html.Div(LOADING_TEXT)
+    max_sum_score = data["max_sum_score"]
+    max_score = data["max_score"]
+    top_strikes = data["top_strikes"]
+    return [
+        html.Div([
+            html.Span(f"Venue: {data['venue']}", style={'marginRight': '20px'}),
+            html.Span(f"Date: {data['date']}", style={'marginRight': '20px'}),
+            html.Span(f"Number of rounds: {data['num_rounds']}", style={'marginRight': '20px'}),
+        ], style={'marginBottom': '10px'}),
+        html.Div([
+            html.Span(f"Top player: {max_sum_score['Hráč']} - {max_sum_score['Skóre 10. kolo']} points", style={'marginRight': '20px'}),
+            html.Span(f"Top round: {max_score['Hráč']} - {max_score['Skóre 10. kolo']} points", style={'marginRight': '20px'}),
+            html.Span(f"Average team score: {data['team_avg_score']:.2f}", style={'marginRight': '20px'}),
+            html.Span(f"Top strikes: {top_strikes['Hráč']} - {top_strikes['Num Strikes']} strikes"),
+        ]),
+    ]
+
+
+# Leaderboard panel of the Team tab, rendered from the snapshot prepared with the data
+LEADERBOARD_STYLE = {
+    'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around', 'backgroundColor': '#2B3E50',
+    'color': 'white', 'padding': '15px 20px', 'borderRadius': '10px', 'marginBottom': '20px'
+}
+
+def leaderboard_children(data):
+    if data is None:
+        return html.Div(LOADING_TEXT)
+    cell = {'padding': '2px 8px'}
+    return [
+        html.Div([
+            html.Div(ranking["title"], style={'fontWeight': 'bold', 'marginBottom': '5px'}),
+            html.Table([
+                html.Tr([
+                    html.Td(f"{row['rank']}.", style=cell),
+                    html.Td(row["player"], style=cell),
+                    html.Td(row["value"], style={**cell, 'textAlign': 'right'}),
+                ]) for row in ranking["rows"]
+            ]),
+        ], style={'margin': '0 10px 10px 10px'})
+        for ranking in data["leaderboard_snapshot"].values()
+    ]
+
+
+# Table of the head-to-head records of every pair of the compared players
+def head_to_head_table(compared):
+    cell = {'padding': '4px 8px', 'textAlign': 'right'}
+    header = ["Player", "Opponent", "Games", "W - L - T", "Avg. margin", "Longest streak", "Current streak"]
+    return html.Table([
+        html.Tr([html.Th(title, style=cell) for title in header]),
+    ] + [
+        html.Tr([
+            html.Td(row["player"], style={**cell, 'textAlign': 'left'}),
+            html.Td(row["opponent"], style={**cell, 'textAlign': 'left'}),
+            html.Td(row["games"], style=cell),
+            html.Td(f"{row['wins']} - {row['losses']} - {row['ties']}", style=cell),
+            html.Td("-" if row["games"] == 0 else f"{row['margin']:+.1f}", style=cell),
+            html.Td(f"{row['longest_streak']} : {row['opponent_longest_streak']}", style=cell),
+            html.Td(f"{row['current_streak']} : {row['opponent_current_streak']}", style=cell),
+        ]) for _, row in compared.iterrows()
+    ], style={'backgroundColor': '#2B3E50', 'color': 'white', 'borderRadius': '10px', 'padding': '10px', 'width': '100%'})
+
+
+def player_options(data):
+    if data is None:
+        return []
+    return [{'label': player, 'value': player} for player in data["players"]]
+
+
+# Range slider over the game days, by index into data["ranges"].days; all days are selected
+def date_range_props(data):
+    if data is None:
+        return {'min': 0, 'max': 0, 'value': [0, 0], 'marks': {}}
+    ranges = data["ranges"]
+    last = max(len(ranges.days) - 1, 0)
+    marks = {i: {'label': label, 'style': {'color': 'white'}} for i, label in ranges.day_marks().items()}
+    return {'min': 0, 'max': last, 'value': [0, last], 'marks': marks}
+
+
+# Window of game positions of the selected days, None when they cover the whole history
+def selected_window(data, days):
+    if not days:
+        return None
+    window = data["ranges"].window(*days)
+    return None if data["ranges"].is_full(window) else window
+
+
+# Dash Layout with CSS styling and Graphs, rebuilt on every page load so it shows the current data.
+# Before the first load finishes it is an empty shell that the data-poll interval fills in.
+def serve_layout():
+    data = refresher.current
+
+    return html.Div([
+        # Bowling Title
+        html.Div([
+            html.H1("Bowling", style={'color': 'white', 'fontSize': '3.5em', 'marginBottom': '20px'}),
+        ], style={'textAlign': 'center'}),
+
+        # Last Game Data label and data box
+        html.Div([
+            html.Div("Last Game Data", style={'color': 'white', 'fontSize': '1.2em', 'marginBottom': '5px'}),
+            html.Div(last_game_children(data), id='last-game-box', style={
+                'backgroundColor': '#2B3E50', 'color': 'white', 'fontSize': '1.1em', 'padding': '15px 20px',
+                'borderRadius': '10px', 'marginBottom': '20px'
+            }),
+        ], style={'textAlign': 'center', 'marginBottom': '30px'}),
+
+        # Filter toggle and dropdown
+        html.Div([
+            html.Div([
+                html.Label("Filter By:", style={'color': 'white', 'fontSize': '1.1em', 'marginRight': '10px'}),
+                dcc.Tabs(
+                    id='filter-tabs',
+                    value='Team',
+                    children=[
+                        dcc.Tab(label='Player', value='Player', style={'color': 'white'}),
+                        dcc.Tab(label='Team', value='Team', style={'color': 'white'})
+                    ] + ([] if CLIENTSIDE_MODE else [dcc.Tab(label='Compare', value='Compare', style={'color': 'white'})]),
+                    colors={'border': '#2B3E50', 'primary': 'gray', 'background': '#2B3E50'},
+                    style={'width': '150px' if CLIENTSIDE_MODE else '240px'}
+                )
+            ], style={'display': 'inline-block', 'verticalAlign': 'top'}),
+
+            html.Div([
+                html.Label("Select Player:", style={'color': 'white', 'fontSize': '1.1em', 'marginRight': '10px'}),
+                dcc.Dropdown(
+                    id='player-dropdown',
+                    options=player_options(data),
+                    placeholder="Select...",
+                    style={'width': '200px', 'fontSize': '1em'}
+                ),
+            ], id='player-dropdown-container', style={'display': 'none', 'marginLeft': '20px'}),
+
+            html.Div([
+                html.Label("Compare Players:", style={'color': 'white', 'fontSize': '1.1em', 'marginRight': '10px'}),
+                dcc.Dropdown(
+                    id='compare-dropdown',
+                    options=player_options(data),
+                    multi=True,
+                    placeholder="Select two or more...",
+                    style={'width': '400px', 'fontSize': '1em'}
+                ),
+            ], id='compare-dropdown-container', style={'display': 'none', 'marginLeft': '20px'}),
+        ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'flex-start', 'padding': '10px 0'}),
+
+        # Game days the overview and the graphs cover. The clientside callbacks always show the
+        # whole history, so there is no slider in that mode.
+        html.Div([
+            html.Label("Game days:", style={'color': 'white', 'fontSize': '1.1em', 'marginRight': '10px'}),
+            html.Div(dcc.RangeSlider(id='date-range', step=1, allowCross=False, **date_range_props(data)), style={'flex': '1'}),
+            html.A("Animated results", href='/export/result-distribution', target='_blank',
+                   style={'color': 'white', 'marginLeft': '10px'}),
+        ], style={'display': 'none' if CLIENTSIDE_MODE else 'flex', 'alignItems': 'center', 'padding': '10px 0'}),
+
+        # Box for Player or Team
+        html.Div(id='selection-overview-box', style={
+            'backgroundColor': '#2B3E50', 'color': 'white', 'fontSize': '1.1em', 'padding': '15px 20px',
+            'borderRadius': '10px', 'marginBottom': '20px', 'textAlign': 'left'
+        }),
+
+        # Leaderboard, shown on the Team tab
+        html.Div(leaderboard_children(data), id='leaderboard-panel', style=LEADERBOARD_STYLE),
+
+        # Graphs container for Team or Player tab
+        html.Div(id='graphs-container', children=client_graphs() if CLIENTSIDE_MODE else [],
+                 style={'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around'}),
+
+        # Data for the clientside callbacks, shipped once per page load
+        dcc.Store(id='client-data', data=client_payload() if CLIENTSIDE_MODE else None),
+
+        # Version of the data on the page; polled for until the first load is done
+        dcc.Store(id='data-version', data=data.version if data else None),
+        dcc.Interval(id='data-poll', interval=1000, disabled=data is not None)
+    ], style={'backgroundColor': '#1A1A2E', 'minHeight': '100vh', 'padding': '20px'})
+
+app.layout = serve_layout
+
+
+# Fill in the shell once the background load is done
+@app.callback(
+    [Output('last-game-box', 'children'), Output('leaderboard-panel', 'children'), Output('player-dropdown', 'options'),
+     Output('compare-dropdown', 'options'), Output('data-version', 'data'), Output('data-poll', 'disabled'), Output('date-range', 'min'), Output('date-range', 'max'),
+     Output('date-range', 'value'), Output('date-range', 'marks')] + ([Output('client-data', 'data')] if CLIENTSIDE_MODE else []),
+    Input('data-poll', 'n_intervals'),
+    prevent_initial_call=True
+)
+def fill_in_data(n_intervals):
+    data = refresher.current
+    if data is None:
+        raise PreventUpdate
+    slider = date_range_props(data)
+    outputs = [last_game_children(data), leaderboard_children(data), player_options(data), player_options(data), data.version, True,
+               slider['min'], slider['max'], slider['value'], slider['marks']]
+    if CLIENTSIDE_MODE:
+        outputs.append(client_payload())
+    return outputs
+
+
+if CLIENTSIDE_MODE:
+    app.clientside_callback(
+        ClientsideFunction(namespace='bowling', function_name='update_selection_overview'),
+        Output('selection-overview-box', 'children'),
+        [Input('filter-tabs', 'value'), Input('player-dropdown', 'value'), Input('client-data', 'data')]
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='bowling', function_name='display_graphs'),
+        [Output(f'client-graph-{i}', 'figure') for i in range(4)] + [Output(f'client-graph-{i}', 'style') for i in range(4)],
+        [Input('filter-tabs', 'value'), Input('player-dropdown', 'value'), Input('client-data', 'data')]
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='bowling', function_name='toggle_player_dropdown'),
+        [Output('player-dropdown-container', 'style'), Output('leaderboard-panel', 'style')],
+        Input('filter-tabs', 'value')
+    )
+
+else:
+    # Callback to update the new box content based on tab selection and player selection
+    @app.callback(
+        Output('selection-overview-box', 'children'),
+        [Input('filter-tabs', 'value'), Input('player-dropdown', 'value'), Input('data-version', 'data'),
+         Input('date-range', 'value'), Input('compare-dropdown', 'value')]
+    )
+    @utils.metrics.instrument("bowling_callback_seconds", "Dash callback latency", callback="update_selection_overview")
+    def update_selection_overview(tab, selected_player, version, days, compared_players):
+        data = refresher.current
+        if data is None:
+            return LOADING_TEXT
+        # Statistics of the selected days come from the prefix sums, whatever the window
+        window = selected_window(data, days)
+        if tab == 'Player' and selected_player in data["player_summary"].index:
+            stats = data["ranges"].player_stats(selected_player, window)
+            if not stats["games"]:
+                return html.Div(f"Selected Player: {selected_player} - no games in the selected days")
+            best_round = stats["best"]
+            worst_round = stats["worst"]
+            avg_score = round(stats["average"], 0)
+
+            return html.Div([
+                html.Span(f"Selected Player: {selected_player}", style={'fontWeight': 'bold', 'marginRight': '15px'}),
+                html.Span(f"Best round: {best_round}", style={'marginRight': '15px'}),
+                html.Span(f"Worst round: {worst_round}", style={'marginRight': '15px'}),
+                html.Span(f"Average score: {avg_score}", style={'marginRight': '15px'}),
+                html.Span(f"Std. deviation: {stats['variance'] ** 0.5:.1f}", style={'marginRight': '15px'}),
+                html.Span(f"Games: {stats['games']}", style={'marginRight': '15px'})
+            ], style={'display': 'flex', 'alignItems': 'center', 'flexWrap': 'wrap'})
+
+        elif tab == 'Compare':
+            compared = data["head_to_head"].compare(compared_players or [], window)
+            if compared.empty:
+                return html.Div("Head to Head: select two or more players")
+            return html.Div([
+                html.Span("Head to Head", style={'fontWeight': 'bold', 'marginRight': '15px'}),
+                html.Span(f"Players: {len(set(compared['player']) | set(compared['opponent']))}", style={'marginRight': '15px'}),
+                html.Span(f"Pairs: {len(compared)}", style={'marginRight': '15px'}),
+                html.Span(f"Shared games: {compared['games'].sum()}")
+            ], style={'display': 'flex', 'alignItems': 'center', 'flexWrap': 'wrap'})
+
+        else:
+            team = data["ranges"].team_stats(window)
+            top_team_player = team["top_player"]
+            top_team_score = team["top_score"]
+            worst_team_player = team["worst_player"]
+            worst_team_score = team["worst_score"]
+            avg_team_score = round(team["average"], 0)
+            return html.Div([
+                html.Span("Team Overview: Duto Duto", style={'fontWeight': 'bold', 'marginRight': '15px'}),
+                html.Span(f"Top team score: {top_team_player} - {top_team_score} points", style={'marginRight': '15px'}),
+                html.Span(f"Worst team score: {worst_team_player} - {worst_team_score} points", style={'marginRight': '15px'}),
+                html.Span(f"Average team score: {avg_team_score}", style={'marginRight': '15px'}),
+                html.Span(f"Games: {team['games']}")
+            ], style={'display': 'flex', 'alignItems': 'center', 'flexWrap': 'wrap'})
+
+
+    # Callback for showing graphs based on tab selection and player filter
+    @app.callback(
+        Output('graphs-container', 'children'),
+        [Input('filter-tabs', 'value'),
+         Input('player-dropdown', 'value'),
+         Input('data-version', 'data'),
+         Input('date-range', 'value'),
+         Input('compare-dropdown', 'value')]
+    )
+    @utils.metrics.instrument("bowling_callback_seconds", "Dash callback latency", callback="display_graphs")
+    def display_graphs(tab, selected_player, version, days, compared_players):
+        data = refresher.current
+        if data is None:
+            return []
+        history = data.get("history")
+        ranges = data["ranges"]
+        window = selected_window(data, days)
+
+        # Figure inputs are only read when a figure is not cached. The history store returns
+        # just the selected player's games, so they need no player index. A window of days is
+        # a slice of the player's rows, found by a binary search of their positions.
+        @functools.cache
+        def player_rows():
+            if history is None:
+                if window is None:
+                    return data["df"], data["player_index"]
+                lo, hi = utils.ranges.player_rows(data["df"]['absolute_game_position'].to_numpy(),
+                                                  data["player_index"][selected_player], window)
+                return data["df"].iloc[lo:hi], {selected_player: (0, hi - lo)}
+            games, _ = history.player_games(selected_player)
+            if window is not None:
+                games = games[games['absolute_game_position'].between(*window).to_numpy()]
+            return games, None
+
+        def df():
+            return player_rows()[0]
+
+        def player_index():
+            return player_rows()[1]
+
+        # Both pies are the difference of two rows of the cumulative result counts
+        def round_results_percentage(player=None):
+            return utils.frames.percentages(ranges.result_counts(player, window))
+
+        @functools.cache
+        def team_df():
+            games = data["df"] if history is None else history.games()
+            return games if window is None else games.iloc[utils.ranges.window_rows(games['absolute_game_position'], window)]
+
+        def avg_min_max_scores():
+            scores = data["avg_min_max_scores"] if history is None else history.avg_min_max_scores()
+            return scores if window is None else [series.loc[window[0]:window[1]] for series in scores]
+
+        def figure(kind, build, player=None, binsize=None):
+            def timed_build():
+                with utils.metrics.timer("bowling_figure_build_seconds", "Figure generator latency", figure=kind):
+                    return build()
+            return figure_cache.get(data.version, kind, timed_build, player, binsize, window)
+
+        if tab == 'Player' and selected_player:
+            if window is not None and not ranges.player_stats(selected_player, window)["games"]:
+                return []
+            return [
+                dcc.Graph(id='strikes-spare-evolution-plot', figure=figure('strikes-spares', lambda: utils.graph_player.generate_combined_strikes_and_spares_evolution_plot(df(),selected_player,player_index()), selected_player), style={'width': '48%'}),
+                dcc.Graph(id='position-over-time-plot', figure=figure('player-score-dist', lambda: utils.graph_player.generate_player_score_dist(df(),selected_player, 10, player_index()), selected_player, 10), style={'width': '48%'}),
+                dcc.Graph(id='spares-evolution-plot', figure=figure('position-over-time', lambda: utils.graph_player.generate_position_over_time_plot(df(),selected_player,player_index()), selected_player), style={'width': '48%'}),
+                dcc.Graph(id='round-distribution-plot', figure=figure('round-distribution', lambda: utils.graph_player.generate_player_result_pie(round_results_percentage(selected_player),selected_player), selected_player), style={'width': '48%'})
+            ]
+        elif tab == 'Team':
+            return [
+                dcc.Graph(id='absolute-game-score-plot', figure=figure('absolute-game-score', lambda: utils.graph_team.generate_absolute_game_score_plot(team_df(),data["color_dict"])), style={'width': '48%'}),
+                dcc.Graph(id='total_total_score_dist', figure=figure('total-score-dist', lambda: utils.graph_team.generate_total_score_dist(team_df(),10), binsize=10), style={'width': '48%'}),
+                dcc.Graph(id='avg-min-max-plot', figure=figure('avg-min-max', lambda: utils.graph_team.generate_avg_min_max_plot(avg_min_max_scores())), style={'width': '48%'}),
+                dcc.Graph(id='result-distribution-pie', figure=figure('result-distribution', lambda: utils.graph_team.generate_result_distribution_pie(round_results_percentage())), style={'width': '48%'})
+            ]
+        elif tab == 'Compare':
+            # The records of all pairs are computed once per data version; a window of days
+            # broadcasts only the compared players over its games
+            compared = data["head_to_head"].compare(compared_players or [], window)
+            if compared.empty:
+                return []
+            players = tuple(dict.fromkeys(compared_players))
+            return [
+                html.Div(head_to_head_table(compared), style={'width': '48%'}),
+                dcc.Graph(id='head-to-head-heatmap', figure=figure('head-to-head', lambda: utils.graph_team.generate_head_to_head_heatmap(data["head_to_head"].win_rates(players, window)), players), style={'width': '48%'})
+            ]
+        else:
+            return []
+
+
+    # Toggle player dropdown, compare dropdown and leaderboard visibility
+    @app.callback(
+        [Output('player-dropdown-container', 'style'), Output('leaderboard-panel', 'style'),
+         Output('compare-dropdown-container', 'style')],
+        Input('filter-tabs', 'value')
+    )
+    @utils.metrics.instrument("bowling_callback_seconds", "Dash callback latency", callback="toggle_player_dropdown")
+    def toggle_player_dropdown(filter_value):
+        if filter_value == 'Player':
+            return {'display': 'inline-block', 'marginLeft': '20px'}, {**LEADERBOARD_STYLE, 'display': 'none'}, {'display': 'none'}
+        elif filter_value == 'Compare':
+            return {'display': 'none'}, {**LEADERBOARD_STYLE, 'display': 'none'}, {'display': 'inline-block', 'marginLeft': '20px'}
+        else:
+            return {'display': 'none'}, LEADERBOARD_STYLE, {'display': 'none'}
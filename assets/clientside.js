@@ -0,0 +1,189 @@
+// Clientside callbacks for BOWLING_CLIENTSIDE mode.
+// They read the columnar payload from utils/client_data.py that the page ships in the 'client-data' store.
+
+(function () {
+    var WIDTH = {'width': '48%'};
+    var LAYOUT_DEFAULT = {plot_bgcolor: '#E5ECF6', xaxis: {gridcolor: 'white'}, yaxis: {gridcolor: 'white'}};
+    var LAYOUT_WHITE = {plot_bgcolor: 'white', xaxis: {gridcolor: '#EBF0F8'}, yaxis: {gridcolor: '#EBF0F8'}};
+
+    function span(text, style) {
+        return {type: 'Span', namespace: 'dash_html_components', props: {children: text, style: style}};
+    }
+
+    function layout(base, extra) {
+        var merged = JSON.parse(JSON.stringify(base));
+        Object.keys(extra).forEach(function (key) {
+            if (typeof extra[key] === 'object' && !Array.isArray(extra[key]) && merged[key]) {
+                Object.assign(merged[key], extra[key]);
+            } else {
+                merged[key] = extra[key];
+            }
+        });
+        return merged;
+    }
+
+    function rows(data, i) {
+        return [data.offsets[i], data.offsets[i + 1]];
+    }
+
+    function slice(values, range) {
+        return values.slice(range[0], range[1]);
+    }
+
+    // Missing values are null in the payload; the graphs leave them out
+    function present(values) {
+        return values.filter(function (value) { return value !== null; });
+    }
+
+    // x and y of a trace without the points whose y is missing
+    function points(x, y) {
+        var xs = [], ys = [];
+        y.forEach(function (value, i) {
+            if (value !== null) {
+                xs.push(x[i]);
+                ys.push(value);
+            }
+        });
+        return {x: xs, y: ys};
+    }
+
+    function scatter(x, y, trace) {
+        return Object.assign(points(x, y), trace);
+    }
+
+    function histogram(scores, binsize, title) {
+        scores = present(scores);
+        var start = Math.min.apply(null, scores);
+        var end = Math.max.apply(null, scores) + binsize;
+        var tickvals = [], ticktext = [];
+        for (var i = start; i < end; i += binsize) {
+            tickvals.push(i + binsize / 2);
+            ticktext.push(i + '-' + (i + binsize - 1));
+        }
+        return {
+            data: [{type: 'histogram', x: scores, xbins: {start: start, end: end, size: binsize},
+                    marker: {color: 'blue', line: {color: 'black', width: 1}}}],
+            layout: layout(LAYOUT_DEFAULT, {title: {text: title}, xaxis: {title: {text: 'Score Ranges'}, tickmode: 'array',
+                                            tickvals: tickvals, ticktext: ticktext}, yaxis: {title: {text: 'Frequency'}}})
+        };
+    }
+
+    function pie(data, counts, title) {
+        var labels = [], values = [], total = 0;
+        counts.forEach(function (count) { total += count; });
+        counts.forEach(function (count, i) {
+            if (count > 0) {
+                labels.push(data.result_labels[i]);
+                values.push(count / total * 100);
+            }
+        });
+        return {data: [{type: 'pie', labels: labels, values: values, hole: 0.3}],
+                layout: layout(LAYOUT_DEFAULT, {title: {text: title}})};
+    }
+
+    function playerFigures(data, i) {
+        var player = data.players[i];
+        var range = rows(data, i);
+        var position = slice(data.position, range);
+        return [
+            {data: [scatter(position, slice(data.strikes, range), {type: 'scatter', mode: 'lines+markers', name: 'Strikes Over Time'}),
+                    scatter(position, slice(data.spares, range), {type: 'scatter', mode: 'lines+markers', name: 'Spares Over Time'})],
+             layout: layout(LAYOUT_WHITE, {title: {text: 'Evolution of Strikes and Spares Over Time for Player ' + player},
+                                           xaxis: {title: {text: 'Absolute Game Position'}}, yaxis: {title: {text: 'Number of Strikes/Spares'}}})},
+            histogram(slice(data.score, range), 10, 'Scores Distribution for Player ' + player),
+            {data: [scatter(position, slice(data.rank, range), {type: 'scatter', mode: 'lines+markers'})],
+             layout: layout(LAYOUT_WHITE, {title: {text: 'Position Over Time for Player ' + player},
+                                           xaxis: {title: {text: 'Absolute Game Position'}},
+                                           yaxis: {title: {text: 'Position'}, autorange: 'reversed'}})},
+            pie(data, data.result_counts[i], 'Distribution of Round Results for Player ' + player)
+        ];
+    }
+
+    function teamFigures(data) {
+        var traces = data.players.map(function (player, i) {
+            var range = rows(data, i);
+            return scatter(slice(data.position, range), slice(data.score, range),
+                           {type: 'scatter', mode: 'lines+markers', name: player, line: {color: data.colors[i]}});
+        });
+        var totals = data.result_labels.map(function () { return 0; });
+        data.result_counts.forEach(function (counts) {
+            counts.forEach(function (count, j) { totals[j] += count; });
+        });
+        var amm = data.avg_min_max;
+        return [
+            {data: traces, layout: layout(LAYOUT_DEFAULT, {title: {text: 'Scores for Each Player by Absolute Game Order'},
+                                                            xaxis: {title: {text: 'Absolute Game Order'}}, yaxis: {title: {text: 'Score'}},
+                                                            legend: {title: {text: 'Player'}}})},
+            histogram(data.score, 10, 'Scores Distribution'),
+            {data: [scatter(amm.position, amm.average, {type: 'scatter', mode: 'lines+markers', name: 'Average Score', line: {color: 'blue'}}),
+                    scatter(amm.position, amm.min, {type: 'scatter', mode: 'lines', line: {color: 'lightgray', width: 0}, showlegend: false}),
+                    scatter(amm.position, amm.max, {type: 'scatter', fill: 'tonexty', mode: 'lines', line: {color: 'lightgray', width: 0},
+                                                    showlegend: true, name: 'Min-Max Range'})],
+             layout: layout(LAYOUT_DEFAULT, {title: {text: 'Average Scores with Min-Max Range by Absolute Game Order'},
+                                             xaxis: {title: {text: 'Absolute Game Order'}}, yaxis: {title: {text: 'Average Score'}},
+                                             legend: {title: {text: 'Score Type'}}})},
+            pie(data, totals, 'Distribution of Round Results')
+        ];
+    }
+
+    var EMPTY = {data: [], layout: {}};
+
+    // Keep in sync with LEADERBOARD_STYLE in app.py
+    var LEADERBOARD_STYLE = {
+        'display': 'flex', 'flexWrap': 'wrap', 'justifyContent': 'space-around', 'backgroundColor': '#2B3E50',
+        'color': 'white', 'padding': '15px 20px', 'borderRadius': '10px', 'marginBottom': '20px'
+    };
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        bowling: {
+            toggle_player_dropdown: function (filterValue) {
+                if (filterValue === 'Player') {
+                    return [{'display': 'inline-block', 'marginLeft': '20px'},
+                            Object.assign({}, LEADERBOARD_STYLE, {'display': 'none'})];
+                }
+                return [{'display': 'none'}, LEADERBOARD_STYLE];
+            },
+
+            update_selection_overview: function (tab, selectedPlayer, data) {
+                var rowStyle = {'display': 'flex', 'alignItems': 'center', 'flexWrap': 'wrap'};
+                var gap = {'marginRight': '15px'};
+                var i = data ? data.players.indexOf(selectedPlayer) : -1;
+                if (tab === 'Player' && i >= 0) {
+                    return {type: 'Div', namespace: 'dash_html_components', props: {style: rowStyle, children: [
+                        span('Selected Player: ' + selectedPlayer, {'fontWeight': 'bold', 'marginRight': '15px'}),
+                        span('Best round: ' + data.best[i], gap),
+                        span('Worst round: ' + data.worst[i], gap),
+                        span('Average score: ' + Math.round(data.average[i]).toFixed(1), gap)
+                    ]}};
+                }
+                if (!data) {
+                    return 'Loading data...';
+                }
+                var team = data.team;
+                return {type: 'Div', namespace: 'dash_html_components', props: {style: rowStyle, children: [
+                    span('Team Overview: Duto Duto', {'fontWeight': 'bold', 'marginRight': '15px'}),
+                    span('Top team score: ' + team.top_player + ' - ' + team.top_score + ' points', gap),
+                    span('Worst team score: ' + team.worst_player + ' - ' + team.worst_score + ' points', gap),
+                    span('Average team score: ' + Math.round(team.average).toFixed(1))
+                ]}};
+            },
+
+            display_graphs: function (tab, selectedPlayer, data) {
+                var hidden = {'display': 'none'};
+                if (!data) {
+                    return [EMPTY, EMPTY, EMPTY, EMPTY, hidden, hidden, hidden, hidden];
+                }
+                var figures;
+                var i = data.players.indexOf(selectedPlayer);
+                if (tab === 'Player' && i >= 0) {
+                    figures = playerFigures(data, i);
+                } else if (tab === 'Team') {
+                    figures = teamFigures(data);
+                } else {
+                    return [EMPTY, EMPTY, EMPTY, EMPTY, hidden, hidden, hidden, hidden];
+                }
+                return figures.concat([WIDTH, WIDTH, WIDTH, WIDTH]);
+            }
+        }
+    });
+})();
@@ -0,0 +1,118 @@
+# benchmarks/cold_start.py
+#
+# Starts the server as a fresh process and measures, from process start:
+#   first byte  - until GET / returns its first response (the layout shell)
+#   data ready  - until GET /ready returns 200 (the first dataset is prepared)
+#
+# The data comes from a synthetic snapshot, so no Google credentials are needed. Run from
+# the repository root:
+#
+#   python -m benchmarks.cold_start
+#   python -m benchmarks.cold_start --server gunicorn --runs 5 --output cold_start.json
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "dev": lambda port: [sys.executable, "-c", f"from app import app; app.run(host='127.0.0.1', port={port})"],
+    "gunicorn": lambda port: [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", "2",
+                              "--bind", f"127.0.0.1:{port}", "wsgi:server"],
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Status of GET `path`, or None while nothing is listening yet
+def _get(port, path):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    except OSError:
+        return None
+    finally:
+        connection.close()
+
+
+def _wait_for(port, path, status, start, timeout, poll=0.005):
+    while time.perf_counter() - start < timeout:
+        if _get(port, path) == status:
+            return time.perf_counter() - start
+        time.sleep(poll)
+    raise TimeoutError(f"GET {path} did not return {status} within {timeout}s")
+
+
+def measure(server, env, timeout=120.0):
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(SERVERS[server](port), cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first_byte = _wait_for(port, "/", 200, start, timeout)
+        data_ready = _wait_for(port, "/ready", 200, start, timeout)
+    finally:
+        process.terminate()
+        process.wait()
+    return {"first_byte_seconds": first_byte, "data_ready_seconds": data_ready}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time to first byte and time to data after a cold start")
+    parser.add_argument("--server", choices=list(SERVERS), default="dev")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--players", type=int, default=12)
+    parser.add_argument("--game-days", type=int, default=200)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    import utils
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # No credentials, so the app falls back to this snapshot
+        snapshot_path = os.path.join(tmp, "Bowling-liga.parquet")
+        raw = utils.synthetic.generate_sheet(args.players, args.game_days)
+        utils.snapshot.write_snapshot(utils.snapshot.type_columns(raw), None, snapshot_path)
+        env = dict(os.environ, BOWLING_SNAPSHOT_PATH=snapshot_path, GOOGLE_SHEETS_KEY=os.path.join(tmp, "missing.json"))
+        env.pop("BOWLING_SHARED_DATA_DIR", None)
+        if args.server == "gunicorn":
+            env["BOWLING_SHARED_DATA_DIR"] = os.path.join(tmp, "shared")
+
+        runs = []
+        for i in range(args.runs):
+            runs.append(measure(args.server, env))
+            print(f"run {i + 1}: first byte {runs[-1]['first_byte_seconds'] * 1000:8.1f} ms, "
+                  f"data ready {runs[-1]['data_ready_seconds'] * 1000:8.1f} ms")
+
+    results = {
+        "server": args.server,
+        "rows": len(raw),
+        "runs": runs,
+        "median_first_byte_seconds": statistics.median(run["first_byte_seconds"] for run in runs),
+        "median_data_ready_seconds": statistics.median(run["data_ready_seconds"] for run in runs),
+    }
+    print(f"median: first byte {results['median_first_byte_seconds'] * 1000:.1f} ms, "
+          f"data ready {results['median_data_ready_seconds'] * 1000:.1f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
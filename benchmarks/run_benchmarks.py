@@ -0,0 +1,165 @@
+# benchmarks/run_benchmarks.py
+#
+# Times and memory-profiles prepare_data and every generate_* figure builder on synthetic
+# leagues of increasing size. Run from the repository root:
+#
+#   python -m benchmarks.run_benchmarks --output results.json
+#   python -m benchmarks.run_benchmarks --baseline results.json --threshold 0.25
+#
+# With --baseline the run exits with status 1 if any benchmark got slower (or used more
+# memory) than the baseline by more than the threshold.
+import argparse
+import inspect
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly
+
+import utils
+
+# players, game days, games per day
+TIERS = {
+    "small": (6, 20, 3),
+    "medium": (12, 200, 4),
+    "large": (20, 1000, 5),
+}
+
+# Timings and allocations below these are too noisy to flag as regressions
+MIN_SECONDS = 0.01
+MIN_PEAK_BYTES = 2**20
+
+
+def _measure(func, repeat):
+    # One warm-up run, then the best wall time of `repeat` runs and the peak traced allocation
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(times), "peak_bytes": peak}
+
+
+# Arguments for a generate_* function, looked up by parameter name
+def _arguments(func, data, player):
+    available = {
+        "df": data["df"],
+        "color_dict": data["color_dict"],
+        "binsize": 10,
+        "avg_min_max_scores": data["avg_min_max_scores"],
+        "round_results_percentage": data["round_results_percentage"],
+        "player": player,
+        "player_index": data["player_index"],
+        "frame_matrix": data["frame_matrix"],
+        "days": data["ranges"].days,
+        "cumulative_counts": data["ranges"].cumulative_result_counts(),
+        "win_rates": data["head_to_head"].win_rates(data["players"][:4]),
+    }
+    args = []
+    for name, param in inspect.signature(func).parameters.items():
+        if name in available:
+            args.append(available[name])
+        elif param.default is inspect.Parameter.empty:
+            raise TypeError(f"no benchmark argument for {func.__name__}({name})")
+        else:
+            break
+    return args
+
+
+def _generators():
+    for module in (utils.graph_team, utils.graph_player):
+        for name, func in inspect.getmembers(module, inspect.isfunction):
+            if name.startswith("generate_") and func.__module__ == module.__name__:
+                yield f"{module.__name__.split('.')[-1]}.{name}", func
+
+
+def run_tier(players, game_days, games_per_day, repeat, seed=0):
+    raw = utils.synthetic.generate_sheet(players, game_days, games_per_day, seed=seed)
+    results = {"rows": len(raw)}
+    results["data_prep.prepare_data"] = _measure(lambda: utils.data_prep.prepare_data(raw.copy()), repeat)
+
+    data = utils.data_prep.prepare_data(raw.copy())
+    results["scoring.running_scores"] = _measure(lambda: utils.scoring.running_scores(data["frame_matrix"]), repeat)
+    results["scoring.running_scores"]["games_per_second"] = len(raw) / max(results["scoring.running_scores"]["seconds"], 1e-9)
+    player = data["players"][0]
+    # Statistics of the middle half of the game days, for every player
+    ranges = data["ranges"]
+    window = ranges.window(len(ranges.days) // 4, 3 * len(ranges.days) // 4)
+    results["ranges.team_stats"] = _measure(lambda: ranges.team_stats(window), repeat)
+    # Records of every pair of players, computed afresh as after a data refresh
+    results["head_to_head.records"] = _measure(lambda: utils.head_to_head.HeadToHead(data["df"]), repeat)
+    for name, func in _generators():
+        args = _arguments(func, data, player)
+        results[name] = _measure(lambda: func(*args), repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for tier, benches in results["tiers"].items():
+        for name, current in benches.items():
+            if name == "rows":
+                continue
+            previous = baseline.get("tiers", {}).get(tier, {}).get(name)
+            if previous is None:
+                continue
+            if current["seconds"] > MIN_SECONDS and current["seconds"] > previous["seconds"] * (1 + threshold):
+                regressions.append(f"{tier} {name}: {previous['seconds']:.4f}s -> {current['seconds']:.4f}s")
+            if current["peak_bytes"] > MIN_PEAK_BYTES and current["peak_bytes"] > previous["peak_bytes"] * (1 + threshold):
+                regressions.append(f"{tier} {name}: {previous['peak_bytes']} B -> {current['peak_bytes']} B peak")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark data preparation and figure generation")
+    parser.add_argument("--tiers", nargs="+", default=list(TIERS), choices=list(TIERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown, default 0.25")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "plotly": plotly.__version__,
+            "repeat": args.repeat,
+        },
+        "tiers": {},
+    }
+    for tier in args.tiers:
+        results["tiers"][tier] = run_tier(*TIERS[tier], repeat=args.repeat)
+        for name, result in results["tiers"][tier].items():
+            if name != "rows":
+                throughput = f" {result['games_per_second']:12,.0f} games/s" if "games_per_second" in result else ""
+                print(f"{tier:<7} {name:<66} {result['seconds'] * 1000:9.1f} ms {result['peak_bytes'] / 2**20:8.1f} MiB{throughput}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+# gunicorn.conf.py
+#
+# Multi-worker serving. The master starts a leader process that loads and prepares the data
+# once, publishes it to BOWLING_SHARED_DATA_DIR and keeps it fresh, and the forked workers only
+# memory-map what it published (see utils/shared_data.py). Sheets API calls and the prepared
+# frame therefore do not multiply with the number of workers. The master itself never touches
+# the data, so it forks workers from a process without threads and stays responsive to signals.
+import multiprocessing
+import os
+import subprocess
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", 2))
+timeout = 120
+
+# Workers find the published data through the environment they inherit from the master
+os.environ.setdefault("BOWLING_SHARED_DATA_DIR", "/tmp/bowling-shared-data")
+
+publisher = None
+
+
+def on_starting(server):
+    global publisher
+    # The first publish runs in the leader process, so workers boot and answer right away
+    # and pick the data up as soon as it is published
+    publisher = subprocess.Popen(
+        [sys.executable, "-m", "utils.shared_data", "--directory", os.environ["BOWLING_SHARED_DATA_DIR"],
+         "--interval", os.environ.get("BOWLING_REFRESH_SECONDS", "600")],
+        cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def on_exit(server):
+    if publisher is None:
+        return
+    publisher.terminate()
+    try:
+        publisher.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        publisher.kill()
+        publisher.wait()
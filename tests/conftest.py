@@ -0,0 +1,15 @@
+# tests/conftest.py
+import pytest
+
+import utils
+
+
+# Synthetic sheet with the column types of a loaded sheet
+def make_sheet(players=6, game_days=12, games_per_day=3, attendance=0.8, seed=0):
+    raw = utils.synthetic.generate_sheet(players, game_days, games_per_day, attendance=attendance, seed=seed)
+    return utils.snapshot.type_columns(raw)
+
+
+@pytest.fixture
+def sheet():
+    return make_sheet
@@ -0,0 +1,51 @@
+# tests/test_data_prep.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils
+from reference_data_prep import prepare_data as reference_prepare_data
+
+# players, game days, games per day, attendance
+SHEETS = [
+    (2, 1, 1, 1.0),
+    (3, 2, 3, 0.8),
+    (6, 20, 3, 0.8),
+    (12, 60, 4, 0.6),
+]
+SEEDS = range(3)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("players,game_days,games_per_day,attendance", SHEETS)
+def test_prepare_data_matches_reference(sheet, players, game_days, games_per_day, attendance, seed):
+    raw = sheet(players, game_days, games_per_day, attendance, seed)
+    expected = reference_prepare_data(raw.copy())
+    result = utils.data_prep.prepare_data(raw.copy())
+
+    # The frame columns are the rows of frame_matrix now. The running average is compared
+    # separately: the reference ran it over each player's games sorted by the game number of the
+    # day, across all days, while prepare_data follows the games in the order they were played
+    frame_columns = result["frame_columns"]
+    columns = [column for column in expected["df"].columns if column not in frame_columns and column != 'cumulative_avg_score']
+    pd.testing.assert_frame_equal(result["df"][columns], expected["df"][columns])
+    labels = np.array(utils.frames.FRAME_LABELS + ['nan'])
+    np.testing.assert_array_equal(labels[result["frame_matrix"]], expected["df"][frame_columns].astype(str).to_numpy())
+    played_order = expected["df"].sort_values(['Hráč', 'absolute_game_position'], kind='stable')
+    running_average = played_order.groupby('Hráč')['Skóre 10. kolo'].expanding().mean().reset_index(level=0, drop=True)
+    np.testing.assert_allclose(result["df"]['cumulative_avg_score'], running_average.loc[result["df"].index], rtol=1e-12)
+
+    for key, value in expected.items():
+        if key == "df":
+            continue
+        if key == "date":
+            assert result[key] == value.strftime('%d/%m/%Y')
+        elif key == "avg_min_max_scores":
+            for result_series, expected_series in zip(result[key], value):
+                pd.testing.assert_series_equal(result_series, expected_series)
+        elif isinstance(value, pd.Series):
+            pd.testing.assert_series_equal(result[key], value, check_names=False, check_dtype=False)
+        elif isinstance(value, np.ndarray):
+            np.testing.assert_array_equal(result[key], value)
+        else:
+            assert result[key] == value, key
@@ -0,0 +1,40 @@
+# tests/test_figure_cache.py
+import plotly.graph_objects as go
+
+from utils import figure_cache
+
+
+def _builder(builds, name):
+    def build():
+        builds.append(name)
+        return go.Figure(layout={"title": name})
+    return build
+
+
+def test_older_version_bypasses_the_cache():
+    cache = figure_cache.FigureCache()
+    builds = []
+    cache.get(2, "pie", _builder(builds, "v2"))
+
+    # A late request of the previous version neither clears nor replaces the cached figures
+    assert cache.get(1, "pie", _builder(builds, "v1"))["layout"]["title"]["text"] == "v1"
+    assert cache.get(1, "pie", _builder(builds, "v1"))["layout"]["title"]["text"] == "v1"
+    assert cache.get(2, "pie", _builder(builds, "v2"))["layout"]["title"]["text"] == "v2"
+    assert builds == ["v2", "v1", "v1"]
+    assert cache.stats()["version"] == 2 and cache.stats()["size"] == 1
+
+    cache.get(3, "pie", _builder(builds, "v3"))
+    assert cache.stats()["version"] == 3 and cache.stats()["size"] == 1
+
+
+def test_invalidate_sets_the_published_version():
+    cache = figure_cache.FigureCache()
+    builds = []
+    cache.get(5, "pie", _builder(builds, "v5"))
+
+    # A restarted leader publishes version 1 again
+    cache.invalidate(1)
+    cache.get(1, "pie", _builder(builds, "v1"))
+    cache.get(1, "pie", _builder(builds, "v1"))
+    assert builds == ["v5", "v1"]
+    assert cache.stats()["version"] == 1 and cache.stats()["size"] == 1
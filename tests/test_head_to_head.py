@@ -0,0 +1,54 @@
+# tests/test_head_to_head.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils
+from utils import head_to_head
+from test_update_data import _assert_same
+
+
+@pytest.mark.parametrize("block_cells", [1, 500, 10 ** 9])
+def test_blocked_records_match_one_broadcast(sheet, block_cells):
+    raw = sheet(9, 12, 3, attendance=0.7)
+    raw.loc[raw.sample(5, random_state=0).index, 'Skóre 10. kolo'] = np.nan
+    scores = head_to_head.HeadToHead(utils.data_prep.prepare_data(raw)['df']).scores
+
+    blocked = head_to_head._blocked_records(scores, block_cells)
+    expected = head_to_head._records(scores, scores)
+    for name in head_to_head.RECORDS:
+        assert blocked[name].dtype == expected[name].dtype, name
+        np.testing.assert_array_equal(blocked[name], expected[name], err_msg=name)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_extend_matches_a_full_build(sheet, seed):
+    raw = sheet(7, 10, 3, attendance=0.6, seed=seed)
+    raw.loc[raw.sample(5, random_state=seed).index, 'Skóre 10. kolo'] = np.nan
+    raw.loc[raw.sample(2, random_state=seed + 10).index, 'Den'] = pd.NaT
+    df = utils.data_prep.prepare_data(raw)['df']
+    full = head_to_head.HeadToHead(df)
+    positions = df['absolute_game_position']
+    players = df['Hráč'].unique()
+    # Some players already played the first games of the cut night, one joins with the new games
+    for cut in (positions.min(), positions.median(), positions.max()):
+        earlier = (positions < cut) | ((positions < cut + 2) & df['Hráč'].isin(players[:3]))
+        earlier &= df['Hráč'] != players[-1]
+        before = head_to_head.HeadToHead(df[earlier])
+        _assert_same(before.extend(df[~earlier]), full)
+        # The previous records may still be served, they are left as they were
+        _assert_same(before, head_to_head.HeadToHead(df[earlier]))
+
+
+def test_history_records_match(sheet, tmp_path):
+    raw = sheet(7, 10, 3, attendance=0.6, seed=3)
+    raw.loc[raw.sample(5, random_state=3).index, 'Skóre 10. kolo'] = np.nan
+    store = utils.history.HistoryStore(str(tmp_path / "history.sqlite"))
+    for k in (len(raw) // 3, len(raw) // 2 + 1, len(raw)):
+        store.sync(raw.iloc[:k])
+        expected = head_to_head.HeadToHead(utils.data_prep.prepare_data(raw.iloc[:k])['df'])
+        records = utils.history.HistoryHeadToHead(store)
+        players = list(expected.players)[::-1]
+        for window in (None, (5, 20)):
+            pd.testing.assert_frame_equal(records.compare(players, window), expected.compare(players, window))
+            pd.testing.assert_frame_equal(records.win_rates(players, window), expected.win_rates(players, window))
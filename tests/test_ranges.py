@@ -0,0 +1,59 @@
+# tests/test_ranges.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils
+from utils import ranges
+from test_update_data import _assert_same
+
+
+def test_games_without_a_date_are_left_out(sheet):
+    raw = sheet(players=5, game_days=6)
+    raw.loc[[3, 20, len(raw) - 1], 'Den'] = pd.NaT
+    data = utils.data_prep.prepare_data(raw)
+    df, frame_matrix, stats = data["df"], data["frame_matrix"], data["ranges"]
+    dated = df['Den'].notna().to_numpy()
+
+    assert len(stats.days) == 6
+    for player, (start, stop) in stats.blocks.items():
+        assert (np.diff(stats.entry_days[start:stop]) > 0).all(), player
+        games = dated & (df['Hráč'] == player).to_numpy()
+        assert stats.player_stats(player)["games"] == games.sum()
+        assert stats.result_counts(player).equals(utils.frames.result_counts(frame_matrix[games]))
+    assert stats.result_counts().equals(utils.frames.result_counts(frame_matrix[dated]))
+    # The last game day only has its own games
+    last_day = (df['Den'] == stats.days[-1]).to_numpy()
+    np.testing.assert_array_equal(stats.cumulative_result_counts()[-1] - stats.cumulative_result_counts()[-2],
+                                  utils.frames.result_counts(frame_matrix[last_day]).to_numpy())
+
+
+# Rows of the sheet from `k` on, prepared as part of the whole sheet
+def _appended(data, k):
+    rows = data["df"].index >= k
+    return data["df"][rows], data["frame_matrix"][rows]
+
+
+@pytest.mark.parametrize("attendance,seed", [(0.6, 0), (0.6, 1), (1.0, 2)])
+def test_extend_matches_a_full_build(sheet, attendance, seed):
+    raw = sheet(players=6, game_days=8, attendance=attendance, seed=seed)
+    full = utils.data_prep.prepare_data(raw)
+    # Inside a game night, at the start of one, and at the first game of the last one (with
+    # everyone attending the blocks grow from 7 to 8 entries, the sparse tables by one level)
+    last_night = int(np.flatnonzero(raw['Den'] == raw['Den'].iloc[-1])[0])
+    for k in (len(raw) // 3, int(np.flatnonzero(raw['Den'] == raw['Den'].iloc[len(raw) // 2])[0]), last_night,
+              len(raw) - 1):
+        stats = utils.data_prep.prepare_data(raw.iloc[:k])["ranges"]
+        _assert_same(stats.extend(*_appended(full, k)), full["ranges"])
+        # The previous statistics may still be served, they are left as they were
+        _assert_same(stats, utils.data_prep.prepare_data(raw.iloc[:k])["ranges"])
+
+
+def test_sparse_table_runs_stop_at_their_group():
+    values = np.array([5, 1, 7, 3, 9, 2, 8], dtype=np.int16)
+    stops = np.array([3, 3, 3, 7, 7, 7, 7])
+    table = ranges.sparse_table(values, np.minimum, 4, stops)
+    # A group's columns equal the table of the group alone
+    np.testing.assert_array_equal(table[:, :3], ranges.sparse_table(values[:3], np.minimum, 4))
+    np.testing.assert_array_equal(table[:, 3:], ranges.sparse_table(values[3:], np.minimum, 4))
+    assert ranges.sparse_query(table, np.minimum, 3, 7) == 2 and ranges.sparse_query(table, np.minimum, 1, 3) == 1
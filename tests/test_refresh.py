@@ -0,0 +1,51 @@
+# tests/test_refresh.py
+import os
+import runpy
+
+import pytest
+
+from utils import refresh
+from utils import shared_data
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def test_trigger_is_refused_right_after_a_refresh(sheet):
+    refresher = refresh.DataRefresher(lambda: sheet(), min_trigger_interval=3600)
+    assert refresher.trigger()
+    assert not refresher.trigger()
+
+    refresher._wake.clear()
+    refresher.refresh()
+    assert not refresher.trigger()
+
+    refresher.min_trigger_interval = 0
+    assert refresher.trigger()
+
+
+def test_worker_trigger_is_refused_while_pending(tmp_path):
+    reader = shared_data.SharedDataReader(str(tmp_path))
+    assert reader.trigger()
+    assert not reader.trigger()
+
+    os.remove(tmp_path / shared_data.REFRESH_REQUEST)
+    assert reader.trigger()
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # A worker of the multi-worker server, it only reads what a leader would publish
+    monkeypatch.setenv("BOWLING_SHARED_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("BOWLING_REFRESH_TOKEN", "s3cret")
+    return runpy.run_path(APP_PATH, run_name="bowling_app")["app"].server.test_client()
+
+
+def test_refresh_endpoint_rejects_bad_token_and_repeated_triggers(server, tmp_path):
+    assert server.post("/refresh").status_code == 403
+    assert server.post("/refresh", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    assert not (tmp_path / shared_data.REFRESH_REQUEST).exists()
+
+    authorized = {"Authorization": "Bearer s3cret"}
+    assert server.post("/refresh", headers=authorized).status_code == 200
+    assert (tmp_path / shared_data.REFRESH_REQUEST).exists()
+    assert server.post("/refresh", headers=authorized).status_code == 429
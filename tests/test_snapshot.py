@@ -0,0 +1,80 @@
+# tests/test_snapshot.py
+import pandas as pd
+import pytest
+
+import utils
+from utils import snapshot
+
+
+class Spreadsheet:
+    def __init__(self, records, modified_time):
+        self.records = records
+        self.modified_time = modified_time
+        self.downloads = 0
+
+    def get_lastUpdateTime(self):
+        return self.modified_time
+
+    @property
+    def sheet1(self):
+        return self
+
+    def get_all_records(self):
+        self.downloads += 1
+        return list(self.records)
+
+
+class Client:
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+        self.error = None
+
+    def open(self, name):
+        if self.error is not None:
+            raise self.error
+        return self.spreadsheet
+
+
+@pytest.fixture
+def client():
+    records = utils.synthetic.generate_sheet(4, 3, 2, seed=0).to_dict('records')
+    return Client(Spreadsheet(records, "2024-03-01T20:00:00Z"))
+
+
+def test_unchanged_sheet_is_not_downloaded_again(client, tmp_path):
+    path = str(tmp_path / "sheet.parquet")
+    first = snapshot.load_sheet(client, path=path)
+    second = snapshot.load_sheet(client, path=path)
+
+    assert client.spreadsheet.downloads == 1
+    assert snapshot.read_snapshot_meta(path)["modified_time"] == "2024-03-01T20:00:00Z"
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_changed_sheet_is_downloaded(client, tmp_path):
+    path = str(tmp_path / "sheet.parquet")
+    snapshot.load_sheet(client, path=path)
+    spreadsheet = client.spreadsheet
+    spreadsheet.records = spreadsheet.records[:-2]
+    spreadsheet.modified_time = "2024-03-08T20:00:00Z"
+
+    df = snapshot.load_sheet(client, path=path)
+
+    assert spreadsheet.downloads == 2 and len(df) == len(spreadsheet.records)
+    assert snapshot.read_snapshot_meta(path) == {"modified_time": "2024-03-08T20:00:00Z", "rows": len(df)}
+    pd.testing.assert_frame_equal(snapshot.read_snapshot(path), df)
+
+
+def test_api_error_falls_back_to_snapshot(client, tmp_path):
+    path = str(tmp_path / "sheet.parquet")
+    expected = snapshot.load_sheet(client, path=path)
+    client.error = ConnectionResetError(104, "Connection reset by peer")
+
+    pd.testing.assert_frame_equal(snapshot.load_sheet(client, path=path), expected)
+    assert client.spreadsheet.downloads == 1
+
+
+def test_api_error_without_snapshot_is_raised(client, tmp_path):
+    client.error = ConnectionResetError(104, "Connection reset by peer")
+    with pytest.raises(ConnectionResetError):
+        snapshot.load_sheet(client, path=str(tmp_path / "sheet.parquet"))
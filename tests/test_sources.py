@@ -0,0 +1,116 @@
+# tests/test_sources.py
+import json
+
+import pandas as pd
+import pytest
+import requests
+
+import utils
+from utils import sources
+
+
+class Spreadsheet:
+    def __init__(self, records, failures):
+        self.records = records
+        self.failures = list(failures)
+
+    def get_lastUpdateTime(self):
+        if self.failures:
+            raise self.failures.pop(0)
+        return "2024-03-01T20:00:00Z"
+
+    @property
+    def sheet1(self):
+        return self
+
+    def get_all_records(self):
+        return list(self.records)
+
+
+class Client:
+    def __init__(self, books):
+        self.books = books
+
+    def open(self, name):
+        return self.books[name]
+
+
+def _records():
+    return utils.synthetic.generate_sheet(4, 3, 2, seed=0).to_dict('records')
+
+
+def _response(status):
+    response = requests.Response()
+    response.status_code = status
+    return response
+
+
+@pytest.mark.parametrize("error, retried", [
+    (requests.exceptions.ConnectionError(ConnectionResetError(104, "Connection reset by peer")), True),
+    (requests.exceptions.ReadTimeout("read timed out"), True),
+    (requests.exceptions.ChunkedEncodingError("connection broken"), True),
+    (requests.exceptions.HTTPError(response=_response(429)), True),
+    (requests.exceptions.HTTPError(response=_response(403)), False),
+    (ConnectionResetError(104, "Connection reset by peer"), True),
+    (KeyError("Skóre 10. kolo"), False),
+])
+def test_retryable(error, retried):
+    assert sources._retryable(error) == retried
+
+
+def test_connection_reset_is_retried_without_snapshot(tmp_path):
+    records = _records()
+    reset = requests.exceptions.ConnectionError(ConnectionResetError(104, "Connection reset by peer"))
+    client = Client({"Liga": Spreadsheet(records, [reset])})
+    sleeps = []
+
+    df = sources.load_sources(client, sources.configured_sources('[{"spreadsheet": "Liga", "season": "2024"}]'),
+                              str(tmp_path), sleep=sleeps.append)
+
+    assert len(sleeps) == 1 and sources.BACKOFF_SECONDS / 2 <= sleeps[0] <= sources.BACKOFF_SECONDS
+    pd.testing.assert_frame_equal(df.drop(columns=[sources.SEASON_COLUMN, sources.SOURCE_COLUMN]),
+                                  utils.snapshot.type_columns(pd.DataFrame(records)))
+
+
+def test_connection_reset_gives_up_after_retries(tmp_path):
+    reset = requests.exceptions.ConnectionError(ConnectionResetError(104, "Connection reset by peer"))
+    client = Client({"Liga": Spreadsheet(_records(), [reset] * (sources.RETRIES + 1))})
+    sleeps = []
+
+    with pytest.raises(sources.SourceError, match="Liga") as raised:
+        sources.load_sources(client, sources.configured_sources('[{"spreadsheet": "Liga"}]'), str(tmp_path), sleep=sleeps.append)
+    assert raised.value.source.label == "Liga" and raised.value.__cause__ is reset
+    assert len(sleeps) == sources.RETRIES
+
+
+def test_retries_stop_at_the_deadline(tmp_path, monkeypatch):
+    monkeypatch.setattr(sources, "RETRY_DEADLINE_SECONDS", 3.0)
+    timeout = requests.exceptions.ReadTimeout("read timed out")
+    client = Client({"Liga": Spreadsheet(_records(), [timeout] * (sources.RETRIES + 1))})
+    # The clock only moves while backing off
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    with pytest.raises(sources.SourceError, match="Liga"):
+        sources.load_sources(client, sources.configured_sources('[{"spreadsheet": "Liga"}]'), str(tmp_path),
+                             sleep=sleep, clock=lambda: now[0])
+    assert 1 <= len(sleeps) < sources.RETRIES and sum(sleeps) <= 3.0
+
+
+def test_permanent_api_error_is_not_retried(tmp_path):
+    gspread = pytest.importorskip("gspread")
+    response = _response(403)
+    response._content = json.dumps({"error": {"code": 403, "message": "The caller does not have permission",
+                                              "status": "PERMISSION_DENIED"}}).encode()
+    denied = gspread.exceptions.APIError(response)
+    client = Client({"Liga 2023": Spreadsheet(_records(), [denied]), "Liga": Spreadsheet(_records(), [])})
+    sleeps = []
+
+    with pytest.raises(sources.SourceError, match="Liga 2023") as raised:
+        sources.load_sources(client, sources.configured_sources('[{"spreadsheet": "Liga 2023"}, {"spreadsheet": "Liga"}]'),
+                             str(tmp_path), sleep=sleeps.append)
+    assert raised.value.__cause__ is denied and sleeps == []
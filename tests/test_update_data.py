@@ -0,0 +1,135 @@
+# tests/test_update_data.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils
+
+
+def _assert_same(result, expected, path="data"):
+    assert type(result) is type(expected), path
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+    elif isinstance(expected, (pd.Series, pd.Index)):
+        (pd.testing.assert_series_equal if isinstance(expected, pd.Series) else pd.testing.assert_index_equal)(
+            result, expected, check_exact=True)
+    elif isinstance(expected, np.ndarray):
+        assert result.dtype == expected.dtype, path
+        np.testing.assert_array_equal(result, expected, err_msg=path)
+    elif isinstance(expected, (list, tuple)):
+        assert len(result) == len(expected), path
+        for i, (x, y) in enumerate(zip(result, expected)):
+            _assert_same(x, y, f"{path}[{i}]")
+    elif isinstance(expected, dict):
+        assert list(result) == list(expected), path
+        for key in expected:
+            _assert_same(result[key], expected[key], f"{path}[{key!r}]")
+    elif isinstance(expected, utils.leaderboard.Leaderboard):
+        # The trees balance on random priorities, the rankings are what has to match
+        _assert_same(result.snapshot(k=10 ** 6), expected.snapshot(k=10 ** 6), path)
+    elif hasattr(expected, "__dict__"):
+        _assert_same({key: value for key, value in vars(result).items() if not callable(value)},
+                     {key: value for key, value in vars(expected).items() if not callable(value)}, path)
+    elif isinstance(expected, float) and np.isnan(expected):
+        assert np.isnan(result), path
+    else:
+        assert result == expected, path
+
+
+# Prepare raw[:k], then fold in the rest
+def _incremental(raw, *splits):
+    splits = list(splits) + [len(raw)]
+    previous = raw.iloc[:splits[0]]
+    data = utils.data_prep.prepare_data(previous)
+    for k in splits[1:]:
+        current = raw.iloc[:k]
+        data = utils.data_prep.update_data(data, previous, current)
+        previous = current
+    return data
+
+
+@pytest.fixture
+def full_prepares(monkeypatch):
+    calls = []
+    prepare_data = utils.data_prep.prepare_data
+
+    def counting(df):
+        calls.append(len(df))
+        return prepare_data(df)
+
+    monkeypatch.setattr(utils.data_prep, "prepare_data", counting)
+    return calls
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("split", [0.3, 0.5, 0.9])
+def test_append_matches_full_prepare(sheet, seed, split):
+    raw = sheet(seed=seed)
+    k = int(len(raw) * split)
+    _assert_same(_incremental(raw, k), utils.data_prep.prepare_data(raw))
+
+
+def test_cuts_inside_a_game_night(sheet):
+    raw = sheet(players=5, game_days=6, games_per_day=4, seed=1)
+    night = raw[raw['Den'] == raw['Den'].iloc[-1]]
+    # After the first game of the night, and in the middle of a game
+    for k in (night.index[0] + 5, night.index[0] + 7, len(raw) - 1):
+        _assert_same(_incremental(raw, k), utils.data_prep.prepare_data(raw))
+
+
+def test_late_joining_player(sheet):
+    raw = sheet(players=4, game_days=6, seed=2)
+    last_day = raw['Den'] == raw['Den'].iloc[-1]
+    newcomer = raw[last_day & (raw['Hráč'] == raw['Hráč'].iloc[0])].assign(**{'Hráč': 'Nováček'})
+    raw = pd.concat([raw, newcomer], ignore_index=True)
+    k = int(np.flatnonzero(last_day)[0])
+    _assert_same(_incremental(raw, k), utils.data_prep.prepare_data(raw))
+
+
+def test_score_mismatches_on_both_sides_of_the_cut(sheet):
+    raw = sheet(players=5, game_days=8, seed=6)
+    k = len(raw) // 2
+    # Totals the frames cannot add up to, before and after the cut and on the last game
+    wrong = [1, k - 2, k + 3, len(raw) - 1]
+    raw.loc[wrong, 'Skóre 10. kolo'] += 301
+    result = _incremental(raw, k)
+    assert sorted(result["score_mismatches"].index) == wrong
+    _assert_same(result, utils.data_prep.prepare_data(raw))
+
+
+def test_chained_appends(sheet, full_prepares):
+    raw = sheet(players=6, game_days=20, seed=3)
+    splits = [len(raw) // 4, len(raw) // 2, len(raw) // 2 + 1, 3 * len(raw) // 4]
+    result = _incremental(raw, *splits)
+    assert full_prepares == [splits[0]]
+    _assert_same(result, utils.data_prep.prepare_data(raw))
+
+
+def test_backfilled_rows_fall_back_to_full_prepare(sheet, full_prepares):
+    raw = sheet(seed=4)
+    k = len(raw) // 2
+    # A game appended to the end of the sheet but dated on the first game day
+    backfill = raw.iloc[[0]].assign(**{'Pořadové č. hry': raw['Pořadové č. hry'].max() + 1})
+    extended = pd.concat([raw.iloc[:k], backfill], ignore_index=True)
+    data = utils.data_prep.prepare_data(raw.iloc[:k])
+    assert utils.data_prep.append_data(data, extended.iloc[k:], first_row=k) is None
+
+    result = utils.data_prep.update_data(data, raw.iloc[:k], extended)
+    assert full_prepares == [k, len(extended)]
+    _assert_same(result, utils.data_prep.prepare_data(extended))
+
+
+def test_edited_rows_fall_back_to_full_prepare(sheet, full_prepares, monkeypatch):
+    raw = sheet(seed=5)
+    k = len(raw) // 2
+    edited = raw.copy()
+    edited.loc[3, 'Skóre 10. kolo'] += 1
+    data = utils.data_prep.prepare_data(raw.iloc[:k])
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("an edited sheet is not an append")
+
+    monkeypatch.setattr(utils.data_prep, "append_data", unexpected)
+    result = utils.data_prep.update_data(data, raw.iloc[:k], edited)
+    assert full_prepares == [k, len(edited)]
+    _assert_same(result, utils.data_prep.prepare_data(edited))
@@ -1,7 +1,73 @@
-# This makes player_graphs and team_graphs available as submodules
-from . import graph_player
-from . import graph_team
+# Submodules are imported on first use (utils.graph_team, utils.data_prep, ...), so importing
+# the package does not pull in pandas, plotly or pyarrow before the server is listening
+import importlib
 
+_SUBMODULES = (
+    # This makes player_graphs and team_graphs available as submodules
+    "graph_player",
+    "graph_team",
 
-# Add the new data_preparation module
-from . import data_prep
+    # Downsampling and WebGL switching for long time series
+    "decimate",
+
+    # Integer code table for frame results, used by data_prep and the player graphs
+    "frames",
+
+    # Running frame scores, as bounds, and validation of the sheet totals
+    "scoring",
+
+    # Player rankings on order-statistic trees, updated as games arrive
+    "leaderboard",
+
+    # Prefix sums and sparse tables for statistics of any range of game days
+    "ranges",
+
+    # Pairwise head-to-head records of the players, from one broadcast of the score matrix
+    "head_to_head",
+
+    # Add the new data_preparation module
+    "data_prep",
+
+    # Local Parquet snapshot of the Google Sheet
+    "snapshot",
+
+    # Background refresh of the prepared data
+    "refresh",
+
+    # LRU cache of serialized figures
+    "figure_cache",
+
+    # Compact columnar payload for the clientside mode
+    "client_data",
+
+    # Synthetic leagues in the sheet's schema, for benchmarks and local runs
+    "synthetic",
+
+    # Latency histograms, counters and the Prometheus text output
+    "metrics",
+
+    # Google Sheets client and the raw data loader
+    "sheets",
+
+    # Several spreadsheets and worksheets (seasons) loaded concurrently as one sheet
+    "sources",
+
+    # Prepared data published once and memory-mapped by every server worker
+    "shared_data",
+
+    # Optional SQLite store of the league history, queried by the callbacks
+    "history",
+
+    # Static pre-rendered bundle of the dashboard, `python -m utils.static_site`
+    "static_site",
+)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_SUBMODULES))
@@ -0,0 +1,69 @@
+# utils/client_data.py
+import json
+
+import numpy as np
+
+from . import frames
+
+
+# Missing values go out as null; the clientside callbacks drop them, like the server graphs do
+def _ints(values):
+    values = np.asarray(values, dtype=float)
+    ints = np.nan_to_num(values).astype(int).tolist()
+    for i in np.flatnonzero(np.isnan(values)).tolist():
+        ints[i] = None
+    return ints
+
+
+def _rounded(values, decimals=2):
+    return [None if np.isnan(value) else value for value in np.round(np.asarray(values, dtype=float), decimals).tolist()]
+
+
+# Compact columnar copy of the prepared data for the clientside callbacks.
+# Per-game arrays are in the player-sorted order of df; player i owns rows offsets[i]:offsets[i + 1].
+def build_payload(data):
+    df = data["df"]
+    player_index = data["player_index"]
+    players = list(player_index)
+    summary = data["player_summary"].reindex(players)
+    team = data["team_summary"]
+    avg_scores, min_scores, max_scores = data["avg_min_max_scores"]
+
+    # Result counts per player, one bincount over each player's block of the frame matrix
+    frame_matrix = data["frame_matrix"]
+    result_counts = [frames.result_counts(frame_matrix[start:stop]).tolist() for start, stop in player_index.values()]
+
+    return {
+        "version": getattr(data, "version", None),
+        "players": players,
+        "colors": [data["color_dict"].get(player) for player in players],
+        "offsets": [start for start, stop in player_index.values()] + [len(df)],
+        "position": _ints(df['absolute_game_position']),
+        "score": _ints(df['Skóre 10. kolo']),
+        "strikes": _ints(df['Num Strikes']),
+        "spares": _ints(df['Num Spares']),
+        "rank": _ints(df['Rank']),
+        "result_labels": frames.FRAME_LABELS,
+        "result_counts": result_counts,
+        "best": _ints(summary['best']),
+        "worst": _ints(summary['worst']),
+        "average": _rounded(summary['average']),
+        "team": {
+            "top_player": team["top_player"],
+            "top_score": int(team["top_score"]),
+            "worst_player": team["worst_player"],
+            "worst_score": int(team["worst_score"]),
+            "average": round(float(team["average"]), 2)
+        },
+        "avg_min_max": {
+            "position": _ints(avg_scores.index),
+            "average": _rounded(avg_scores),
+            "min": _ints(min_scores),
+            "max": _ints(max_scores)
+        }
+    }
+
+
+# Size of the payload as it goes over the wire (before HTTP compression)
+def payload_size(payload):
+    return len(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
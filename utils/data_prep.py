@@ -1,78 +1,352 @@
 # utils/data_prep.py
+import numpy as np
 import pandas as pd
 import plotly.colors
 
-def prepare_data(df):
-    # Format the 'Den' column with corrected date parsing
-    df['Den'] = pd.to_datetime(df['Den'], errors='coerce').dt.strftime('%d/%m/%Y')
+from . import frames
+from . import head_to_head
+from . import leaderboard
+from . import ranges
+from . import scoring
 
-    # Prepare last game data
-    Last_game_rows = df[pd.to_datetime(df['Den'], format='%d/%m/%Y') == pd.to_datetime(df['Den'], format='%d/%m/%Y').max()]
-    players = df['Hráč'].unique()
-    #players = Last_game_rows['Hráč'].unique()
 
+# Frame result columns, e.g. '1. kolo' ... '10. kolo' (the 'Skóre' column holds the final score)
+def frame_columns(df):
+    return [col for col in df.columns if 'kolo' in col and 'Skóre' not in col]
+
+
+# Row offsets of every player in a frame sorted by player: {player: (start, stop)}
+def build_player_index(df):
+    codes, uniques = pd.factorize(df['Hráč'])
+    starts = np.r_[0, np.flatnonzero(np.diff(codes)) + 1]
+    stops = np.r_[starts[1:], len(df)]
+    return {uniques[code]: (int(start), int(stop)) for code, start, stop in zip(codes[starts], starts, stops)}
+
+
+# Rows of one player; with the index it is an O(1) lookup and a slice instead of a full scan
+def select_player(df, player, player_index=None):
+    if player_index is None:
+        return df[df['Hráč'] == player]
+    start, stop = player_index.get(player, (0, 0))
+    return df.iloc[start:stop]
+
+
+# Best, worst, total and average score per player
+def build_player_summary(df):
+    summary = df.groupby('Hráč')['Skóre 10. kolo'].agg(best='max', worst='min', total='sum', games='count')
+    summary['average'] = summary['total'] / summary['games']
+    return summary
+
+
+# Summary of the rows of two summaries, e.g. the previous games and a new game night
+def merge_player_summaries(summary, new_summary):
+    grouped = pd.concat([summary, new_summary]).groupby(level=0)
+    merged = grouped.agg({'best': 'max', 'worst': 'min', 'total': 'sum', 'games': 'sum'})
+    merged['average'] = merged['total'] / merged['games']
+    return merged
+
+
+# Team records from the player summary; ties go to the first player in df order
+def build_team_summary(player_summary):
+    best = player_summary['best']
+    worst = player_summary['worst']
+    return {
+        "top_player": best.idxmax(),
+        "top_score": best.max(),
+        "worst_player": worst.idxmin(),
+        "worst_score": worst.min(),
+        "average": player_summary['total'].sum() / player_summary['games'].sum()
+    }
+
+
+# Parse the dates and encode the frame results of raw sheet rows
+def prepare_rows(df):
+    # Parse 'Den' once; the old string round-trip through '%d/%m/%Y' only dropped the time of day
+    df['Den'] = pd.to_datetime(df['Den'], errors='coerce').dt.normalize()
+
+    # Encode the frame results once, everything below works on the int8 codes
+    round_columns = frame_columns(df)
+    frame_codes = frames.encode_frames(df, round_columns)
+    df = df.drop(columns=round_columns)
+    df['Num Strikes'] = frames.count_strikes(frame_codes)
+    df['Num Spares'] = frames.count_spares(frame_codes)
+    return df, frame_codes, round_columns
+
+
+# Summary of the last game day, from its rows in sheet order
+def last_game_summary(Last_game_rows):
     # Venue and Date for the last game
     venue = Last_game_rows.iloc[0]['Podnik']
-    date = Last_game_rows.iloc[0]['Den']
+    date = Last_game_rows.iloc[0]['Den'].strftime('%d/%m/%Y')
     num_rounds = Last_game_rows['Pořadové č. hry'].max()
 
     # Calculate summary statistics for last game
-    sum_scores = Last_game_rows.groupby('Hráč', as_index=False)['Skóre 10. kolo'].sum()
-    max_sum_score = sum_scores.loc[sum_scores['Skóre 10. kolo'].idxmax()]
-    max_score = Last_game_rows.groupby('Hráč', as_index=False)['Skóre 10. kolo'].max().loc[sum_scores['Skóre 10. kolo'].idxmax()]
+    last_by_player = Last_game_rows.groupby('Hráč', as_index=False)['Skóre 10. kolo']
+    sum_scores = last_by_player.sum()
+    top_index = sum_scores['Skóre 10. kolo'].idxmax()
+    max_sum_score = sum_scores.loc[top_index]
+    max_score = last_by_player.max().loc[top_index]
     total_score = Last_game_rows['Skóre 10. kolo'].sum()
-    team_avg_score = total_score / (num_rounds * len(Last_game_rows['Hráč'].unique()))
+    team_avg_score = total_score / (num_rounds * len(sum_scores))
 
     # Count strikes
-    strike_columns = [col for col in Last_game_rows.columns if 'kolo' in col and 'Skóre' not in col]
-    strike_counts = Last_game_rows.groupby('Hráč')[strike_columns].apply(lambda x: (x == 'Strike').sum().sum())
+    strike_counts = Last_game_rows['Num Strikes'].astype('int64').groupby(Last_game_rows['Hráč']).sum()
     strike_counts_df = strike_counts.reset_index(name='Num Strikes').sort_values(by='Num Strikes', ascending=False)
     top_strikes = strike_counts_df.iloc[0]
 
-    # Prepare data for additional graphs
-    df['Den'] = pd.to_datetime(df['Den'], dayfirst=True, errors='coerce')
-    df = df.sort_values(by=['Hráč', 'Pořadové č. hry'])
-    df['cumulative_avg_score'] = df.groupby('Hráč')['Skóre 10. kolo'].expanding().mean().reset_index(level=0, drop=True)
-
-    ordered_dates = df['Den'].sort_values().unique()
-    cumulative_games = 0
-    games_per_date = {}
-    for date in ordered_dates:
-        date_str = date.strftime('%Y-%m-%d')
-        games_today = df[df['Den'] == date]['Pořadové č. hry'].max()
-        games_per_date[date] = cumulative_games
-        cumulative_games += games_today
-    df['absolute_game_position'] = df['Den'].map(games_per_date) + df['Pořadové č. hry']
+    return {
+        "venue": venue,
+        "date": date,
+        "num_rounds": num_rounds,
+        "max_sum_score": max_sum_score,
+        "max_score": max_score,
+        "team_avg_score": team_avg_score,
+        "top_strikes": top_strikes
+    }
+
+
+# Games whose sheet total is outside the bounds of their running score
+def _score_mismatches(df, score_low, score_high):
+    mismatch = scoring.total_mismatches(score_low, score_high, df['Skóre 10. kolo'])
+    return df.loc[mismatch, ['Hráč', 'Den', 'Pořadové č. hry', 'Skóre 10. kolo']].assign(
+        min_score=score_low[mismatch, -1], max_score=score_high[mismatch, -1])
+
+
+# Row order of the prepared df: by player, then chronologically. The sort is stable, so
+# rows that tie keep their order.
+def _sort_order(df):
+    keys = pd.DataFrame({'Hráč': df['Hráč'].to_numpy(), 'position': df['absolute_game_position'].to_numpy()})
+    return keys.sort_values(by=['Hráč', 'position']).index.to_numpy()
+
+
+def player_colors(players):
+    colors = plotly.colors.qualitative.Plotly
+    return {player: colors[i % len(colors)] for i, player in enumerate(players)}
+
+
+def prepare_data(df):
+    df = df.reset_index(drop=True)
+    df, frame_codes, round_columns = prepare_rows(df)
+
+    # Prepare last game data
+    last_date = df['Den'].max()
+    Last_game_rows = df[df['Den'] == last_date]
+    players = df['Hráč'].unique()
+
+    # Each game day starts where the previous days' games ended
+    games_per_date = df.groupby('Den')['Pořadové č. hry'].max()
+    date_offsets = games_per_date.cumsum().shift(fill_value=0)
+    df['absolute_game_position'] = df['Den'].map(date_offsets) + df['Pořadové č. hry']
+
+    # Prepare data for additional graphs; the running average follows each player's games in order
+    order = _sort_order(df)
+    df = df.iloc[order]
+    scores = df['Skóre 10. kolo']
+    by_player = df['Hráč']
+    df['cumulative_avg_score'] = scores.groupby(by_player).cumsum() / scores.notna().groupby(by_player).cumsum()
 
     grouped = df.groupby('absolute_game_position')['Skóre 10. kolo']
-    avg_min_max_scores = [grouped.mean(), grouped.min() ,grouped.max()]
+    avg_min_max_scores = [grouped.mean(), grouped.min(), grouped.max()]
 
-    round_columns = [col for col in df.columns if 'kolo' in col and 'Skóre' not in col]
-    round_results = df[round_columns].astype(str).apply(pd.Series.value_counts).sum(axis=1).fillna(0)
-    round_results_percentage = (round_results / round_results.sum()) * 100
+    result_counts = frames.result_counts(frame_codes)
+    round_results_percentage = frames.percentages(result_counts)
 
-    df = df.sort_values(by=['Hráč', 'absolute_game_position'])
+    # Rows of the frame matrix follow the final row order of df
+    frame_matrix = frame_codes[order]
+
+    # Bounds of the running score after every frame, and the games whose sheet total they rule out
+    score_low, score_high = scoring.running_scores(frame_matrix)
+    score_mismatches = _score_mismatches(df, score_low, score_high)
 
     # Calculate the rank for each player at each absolute game position
     df['Rank'] = df.groupby('absolute_game_position')['Skóre 10. kolo'].rank(ascending=False, method='min')
 
-    # Color assignment
-    colors = plotly.colors.qualitative.Plotly
-    color_dict = {player: colors[i % len(colors)] for i, player in enumerate(players)}
+    # df is sorted by player, so each player's rows are one contiguous block
+    player_index = build_player_index(df)
+    player_summary = build_player_summary(df)
+    team_summary = build_team_summary(player_summary)
+    board = leaderboard.Leaderboard().add_games(df)
+
+    return {
+        "df": df,
+        "players": players,
+        **last_game_summary(Last_game_rows),
+        "avg_min_max_scores": avg_min_max_scores,
+        "round_results_percentage": round_results_percentage,
+        "result_counts": result_counts,
+        "color_dict": player_colors(players),
+        "frame_matrix": frame_matrix,
+        "frame_columns": round_columns,
+        "score_low": score_low,
+        "score_high": score_high,
+        "score_mismatches": score_mismatches,
+        "player_index": player_index,
+        "player_summary": player_summary,
+        "team_summary": team_summary,
+        "leaderboard": board,
+        "leaderboard_snapshot": board.snapshot(),
+        "ranges": ranges.RangeStats(df, frame_matrix),
+        "head_to_head": head_to_head.HeadToHead(df)
+    }
+
+
+# Rows of the last game day of a prepared df, from the end of every player's block;
+# `first_position` is the position of the day's first game. Returns the rows and their row numbers.
+def _last_day_rows(df, player_index, first_position):
+    positions = df['absolute_game_position'].to_numpy()
+    rows = np.concatenate([np.arange(start + np.searchsorted(positions[start:stop], first_position, side='left'), stop)
+                           for start, stop in player_index.values()] or [np.array([], dtype=int)])
+    # Games without a date have no position and sort after the rest of their player's block
+    rows = rows[~np.isnan(positions[rows])]
+    return df.iloc[rows], rows
+
+
+# Fold rows appended to the sheet into a prepared data_dict. `new_rows` are the sheet rows from
+# `first_row` on. The aggregates are updated from the new rows and the few old rows that share
+# a game position with them, and the history is only copied, never scanned again. Returns None
+# when the new rows do not simply extend the history (a backfilled date, a game before a
+# player's last one, missing values); prepare the full sheet then.
+def append_data(data_dict, new_rows, first_row):
+    prev_df = data_dict["df"]
+    new_rows = new_rows.reset_index(drop=True)
+    new_rows.index += first_row
+    new_df, new_codes, round_columns = prepare_rows(new_rows)
+
+    scores = new_df['Skóre 10. kolo']
+    if (round_columns != list(data_dict["frame_columns"]) or new_df['Den'].isna().any() or scores.isna().any()
+            or not pd.api.types.is_integer_dtype(scores) or not pd.api.types.is_integer_dtype(prev_df['Skóre 10. kolo'])):
+        return None
 
+    # New rows may continue the last game day or start later ones, nothing earlier
+    player_index = data_dict["player_index"]
+    game_days = data_dict["ranges"]
+    last_date = game_days.days[-1]
+    if new_df['Den'].min() < last_date:
+        return None
+    prev_last_rows, prev_last_row_numbers = _last_day_rows(prev_df, player_index, game_days.day_first[-1])
+    last_offset = (prev_last_rows['absolute_game_position'] - prev_last_rows['Pořadové č. hry']).iloc[0]
+    days = pd.concat([prev_last_rows[['Den', 'Pořadové č. hry']], new_df[['Den', 'Pořadové č. hry']]])
+    games_per_date = days.groupby('Den')['Pořadové č. hry'].max()
+    date_offsets = last_offset + games_per_date.cumsum().shift(fill_value=0)
+    new_df['absolute_game_position'] = new_df['Den'].map(date_offsets) + new_df['Pořadové č. hry']
 
+    # Every player's new games must come after their previous ones, and after any game without a date
+    positions = prev_df['absolute_game_position'].to_numpy()
+    first_new = new_df.groupby('Hráč')['absolute_game_position'].min()
+    for player, position in first_new.items():
+        if player in player_index:
+            last_position = positions[player_index[player][1] - 1]
+            if np.isnan(last_position) or position <= last_position:
+                return None
+
+    # Last game day, in sheet order
+    new_last_date = new_df['Den'].max()
+    Last_game_rows = new_df[new_df['Den'] == new_last_date]
+    if new_last_date == last_date:
+        Last_game_rows = pd.concat([prev_last_rows.sort_index()[Last_game_rows.columns], Last_game_rows])
+
+    players = data_dict["players"]
+    new_players = [player for player in new_df['Hráč'].unique() if player not in player_index]
+    if new_players:
+        players = np.concatenate([players, np.array(new_players, dtype=object)])
+
+    # Running averages continue from each player's previous total and game count
+    new_order = _sort_order(new_df)
+    new_df = new_df.iloc[new_order]
+    new_codes = new_codes[new_order]
+    player_summary = data_dict["player_summary"]
+    scores = new_df['Skóre 10. kolo']
+    by_player = new_df['Hráč']
+    previous_total = by_player.map(player_summary['total']).fillna(0)
+    previous_games = by_player.map(player_summary['games']).fillna(0)
+    new_df['cumulative_avg_score'] = ((scores.groupby(by_player).cumsum() + previous_total)
+                                      / (scores.notna().groupby(by_player).cumsum() + previous_games))
+
+    # Only the game positions with new rows change their ranks and their average, min and max;
+    # the old rows at those positions are on the previous last game day
+    new_positions = new_df['absolute_game_position'].unique()
+    touched_old = prev_last_rows['absolute_game_position'].isin(new_positions).to_numpy()
+    touched_rows = pd.concat([prev_last_rows[touched_old], new_df])
+    grouped = touched_rows.groupby('absolute_game_position')['Skóre 10. kolo']
+    touched_ranks = grouped.rank(ascending=False, method='min').to_numpy()
+    old_ranks, new_df['Rank'] = np.split(touched_ranks, [touched_old.sum()])
+    first_new_position = new_positions.min()
+    avg_min_max_scores = [pd.concat([previous.iloc[:previous.index.searchsorted(first_new_position)], updated])
+                          for previous, updated in zip(data_dict["avg_min_max_scores"], [grouped.mean(), grouped.min(), grouped.max()])]
+
+    # Every player's new games come after their old ones, so the rows of a player are their old
+    # block followed by their new block. The old blocks only move by the new rows of the players
+    # sorted before them: the history is copied block by block and its index shifted.
+    new_index = build_player_index(new_df)
+    blocks = []
+    merged_index = {}
+    shifts = {}
+    offset = 0
+    for player in sorted(player_index.keys() | new_index.keys()):
+        start, stop = player_index.get(player, (0, 0))
+        new_start, new_stop = new_index.get(player, (0, 0))
+        blocks.append((start, stop, new_start, new_stop))
+        shifts[player] = offset - start
+        merged_index[player] = (offset, offset + (stop - start) + (new_stop - new_start))
+        offset = merged_index[player][1]
+
+    # Row-aligned arrays in the same order
+    def merge(previous, new):
+        return np.concatenate([part for start, stop, new_start, new_stop in blocks
+                               for part in (previous[start:stop], new[new_start:new_stop])])
+
+    df = pd.concat([part for start, stop, new_start, new_stop in blocks
+                    for part in (prev_df.iloc[start:stop], new_df.iloc[new_start:new_stop]) if len(part)])
+    frame_matrix = merge(data_dict["frame_matrix"], new_codes)
+    new_low, new_high = scoring.running_scores(new_codes)
+    score_low = merge(data_dict["score_low"], new_low)
+    score_high = merge(data_dict["score_high"], new_high)
+
+    # Ranks of the old rows that share a position with new ones, at their rows after the shift
+    touched_row_numbers = prev_last_row_numbers[touched_old] + prev_last_rows['Hráč'][touched_old].map(shifts).to_numpy()
+    rank = df['Rank'].to_numpy(copy=True)
+    rank[touched_row_numbers] = old_ranks
+    df['Rank'] = rank
+
+    # Games are listed like the rows of df: by player, then position (date and game of the day)
+    score_mismatches = pd.concat([data_dict["score_mismatches"], _score_mismatches(new_df, new_low, new_high)])
+    score_mismatches = score_mismatches.sort_values(['Hráč', 'Den', 'Pořadové č. hry'], kind='stable')
+
+    result_counts = data_dict["result_counts"] + frames.result_counts(new_codes)
+    player_summary = merge_player_summaries(player_summary, build_player_summary(new_df))
+    # The previous version may still be served, so the rankings are updated on a copy
+    board = data_dict["leaderboard"].copy().add_games(new_df)
 
     return {
         "df": df,
         "players": players,
-        "venue": venue,
-        "date": date,
-        "num_rounds": num_rounds,
-        "max_sum_score": max_sum_score,
-        "max_score": max_score,
-        "team_avg_score": team_avg_score,
-        "top_strikes": top_strikes,
+        **last_game_summary(Last_game_rows),
         "avg_min_max_scores": avg_min_max_scores,
-        "round_results_percentage": round_results_percentage,
-        "color_dict": color_dict
+        "round_results_percentage": frames.percentages(result_counts),
+        "result_counts": result_counts,
+        "color_dict": player_colors(players),
+        "frame_matrix": frame_matrix,
+        "frame_columns": round_columns,
+        "score_low": score_low,
+        "score_high": score_high,
+        "score_mismatches": score_mismatches,
+        "player_index": merged_index,
+        "player_summary": player_summary,
+        "team_summary": build_team_summary(player_summary),
+        "leaderboard": board,
+        "leaderboard_snapshot": board.snapshot(),
+        "ranges": game_days.extend(new_df, new_codes),
+        "head_to_head": data_dict["head_to_head"].extend(new_df)
     }
+
+
+# Prepare `raw_df` given `data_dict`, prepared earlier from `previous_raw`. Rows appended to
+# the sheet are folded in with append_data; edited or deleted rows mean a full prepare_data.
+def update_data(data_dict, previous_raw, raw_df):
+    n = len(previous_raw)
+    if (len(raw_df) > n and raw_df.columns.equals(previous_raw.columns)
+            and all(raw_df[column].iloc[:n].array.equals(previous_raw[column].array) for column in raw_df.columns)):
+        updated = append_data(data_dict, raw_df.iloc[n:], first_row=n)
+        if updated is not None:
+            return updated
+    return prepare_data(raw_df)
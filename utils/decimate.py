@@ -0,0 +1,90 @@
+# utils/decimate.py
+import numpy as np
+import plotly.graph_objs as go
+
+# Figures with more points than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 1000
+
+# Default number of points a time-series figure keeps after downsampling
+DEFAULT_MAX_POINTS = 2000
+
+
+# Split n points into n_out buckets; the first and last point get a bucket of their own
+def bucket_edges(n, n_out):
+    inner = np.linspace(1, n - 1, n_out - 1).astype(int)
+    return np.r_[0, inner, n]
+
+
+# Largest-Triangle-Three-Buckets: keep the point of each bucket that spans the largest
+# triangle with the previously kept point and the average of the next bucket
+def lttb(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = bucket_edges(n, n_out)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(1, n_out - 1):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2]
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i] = a
+    return selected
+
+
+# Min/max bucketing: keep the lowest and highest point of every bucket, in x order
+def minmax(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    buckets = max(n_out // 2, 1)
+    bucket = np.repeat(np.arange(buckets), np.diff(np.linspace(0, n, buckets + 1).astype(int)))
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets))
+    stops = np.r_[starts[1:], n] - 1
+    return np.unique(np.r_[order[starts], order[stops]])
+
+
+# Per-bucket minimum of `low` and maximum of `high`, so a downsampled min-max band never gets narrower
+def envelope(x, low, high, n_out):
+    n = len(x)
+    x, low, high = np.asarray(x), np.asarray(low), np.asarray(high)
+    if n_out is None or n_out >= n or n_out < 3:
+        return x, low, high
+    starts = bucket_edges(n, n_out)[:-1]
+    return x[starts], np.minimum.reduceat(low, starts), np.maximum.reduceat(high, starts)
+
+
+def downsample(x, y, max_points, method='lttb'):
+    if method == 'minmax':
+        return minmax(x, y, max_points)
+    return lttb(x, y, max_points)
+
+
+# Pick Scatter or Scattergl for a figure from the number of points it will draw
+def trace_class(total_points, webgl_threshold=WEBGL_THRESHOLD):
+    return go.Scattergl if total_points > webgl_threshold else go.Scatter
+
+
+# Scatter trace for one series, downsampled to max_points (None keeps every point).
+# Points with a missing y value are dropped first so they cannot win a bucket.
+def scatter(x, y, max_points=DEFAULT_MAX_POINTS, method='lttb', trace=go.Scatter, **kwargs):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    keep = ~np.isnan(y.astype(float))
+    x, y = x[keep], y[keep]
+    if max_points is not None and len(x) > max_points:
+        idx = downsample(x, y, max_points, method)
+        x, y = x[idx], y[idx]
+    return trace(x=x, y=y, **kwargs)
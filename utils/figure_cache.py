@@ -0,0 +1,67 @@
+# utils/figure_cache.py
+import json
+import threading
+from collections import OrderedDict
+
+from . import metrics
+
+
+# LRU cache of generated figures keyed by (data version, figure kind, player, bin size, window
+# of game positions).
+# Figures are stored already serialized to plain JSON data, so a hit skips both building
+# the plotly Figure and running its validation/encoding again. Entries of an older data
+# version are dropped as soon as a newer version is requested or published (invalidate); a
+# late request still holding an older version builds its figures without caching them.
+class FigureCache:
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version, kind, build, player=None, binsize=None, window=None):
+        key = (version, kind, player, binsize, window)
+        with self._lock:
+            if self.version is None or version > self.version:
+                self._entries.clear()
+                self.version = version
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        # Build outside the lock, a concurrent miss on the same key only costs a duplicate build
+        fig = build()
+        with metrics.timer("bowling_figure_serialize_seconds", "Time to serialize a generated figure", figure=kind):
+            figure = json.loads(fig.to_json())
+
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = figure
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return figure
+
+    # Drop every entry; `version` is the newly published data version, from then on the oldest
+    # one cached. Versions restart with a new leader, so it may be lower than the last one.
+    def invalidate(self, version=None):
+        with self._lock:
+            self._entries.clear()
+            self.version = version
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,49 @@
+# utils/frames.py
+import numpy as np
+import pandas as pd
+
+# Fixed code table for frame results: pin counts keep their value, then Spare and Strike.
+# Anything else (empty cells, typos) is encoded as MISSING.
+FRAME_LABELS = [str(pins) for pins in range(10)] + ['Spare', 'Strike']
+SPARE = FRAME_LABELS.index('Spare')
+STRIKE = FRAME_LABELS.index('Strike')
+MISSING = -1
+
+
+# Encode the string frame columns into a dense int8 (rows x frames) matrix
+def encode_frames(df, columns):
+    values = df[columns].astype(str).to_numpy().ravel()
+    codes = pd.Categorical(values, categories=FRAME_LABELS).codes
+    return codes.astype(np.int8).reshape(len(df), len(columns))
+
+
+def count_strikes(matrix):
+    return (matrix == STRIKE).sum(axis=1, dtype=np.int8)
+
+
+def count_spares(matrix):
+    return (matrix == SPARE).sum(axis=1, dtype=np.int8)
+
+
+# Number of frames with each result, indexed by label
+def result_counts(matrix):
+    codes = matrix[matrix != MISSING]
+    return pd.Series(np.bincount(codes, minlength=len(FRAME_LABELS)), index=FRAME_LABELS)
+
+
+# Number of frames with each result per row, as a (rows x results) matrix
+def row_result_counts(matrix):
+    rows, columns = np.nonzero(matrix != MISSING)
+    cells = rows * len(FRAME_LABELS) + matrix[rows, columns]
+    return np.bincount(cells, minlength=len(matrix) * len(FRAME_LABELS)).reshape(len(matrix), len(FRAME_LABELS))
+
+
+# Share of each result that actually occurs, in percent
+def result_percentages(matrix):
+    return percentages(result_counts(matrix))
+
+
+# Same from counts that were already taken, e.g. summed over several matrices
+def percentages(counts):
+    counts = counts[counts > 0].astype(float)
+    return (counts / counts.sum()) * 100
@@ -1,10 +1,12 @@
-import pandas as pd
 import plotly.graph_objs as go
-import plotly.express as px
 
-def generate_player_score_dist(df,player, binsize):
+from . import data_prep
+from . import decimate
+from . import frames
+
+def generate_player_score_dist(df,player, binsize, player_index=None):
     # Filter the DataFrame for the specific player
-    df_player = df[df['Hráč'] == player]
+    df_player = data_prep.select_player(df, player, player_index)
     
     start = int(df_player['Skóre 10. kolo'].min())
     end = int(df_player['Skóre 10. kolo'].max()) + binsize
@@ -37,26 +39,22 @@ def generate_player_score_dist(df,player, binsize):
     return fig
 
 
-def generate_combined_strikes_and_spares_evolution_plot(df,player):
-    df_player = df[df['Hráč'] == player]
-    strike_columns_all = [col for col in df_player.columns if 'kolo' in col and 'Skóre' not in col]
-    
-    # Calculate total strikes
-    df_player['Total_Strikes'] = df_player[strike_columns_all].apply(lambda x: (x == 'Strike').sum(), axis=1)
-    
-    # Calculate total spares
-    df_player['Total_Spares'] = df_player[strike_columns_all].apply(lambda x: (x == 'Spare').sum(), axis=1)
+def generate_combined_strikes_and_spares_evolution_plot(df,player,player_index=None,max_points=decimate.DEFAULT_MAX_POINTS):
+    # Strike and spare counts per game are precomputed from the frame matrix in prepare_data
+    df_player = data_prep.select_player(df, player, player_index)
+    series_points = None if max_points is None else max(max_points // 2, 3)
+    trace = decimate.trace_class(2 * len(df_player) if max_points is None else min(2 * len(df_player), max_points))
     
     # Create a combined figure
     fig = go.Figure()
     
     # Add strikes trace
-    fig.add_trace(go.Scatter(x=df_player['absolute_game_position'], y=df_player['Total_Strikes'],
-                             mode='lines+markers', name='Strikes Over Time'))
+    fig.add_trace(decimate.scatter(df_player['absolute_game_position'], df_player['Num Strikes'], series_points, trace=trace,
+                                   mode='lines+markers', name='Strikes Over Time'))
     
     # Add spares trace
-    fig.add_trace(go.Scatter(x=df_player['absolute_game_position'], y=df_player['Total_Spares'],
-                             mode='lines+markers', name='Spares Over Time'))
+    fig.add_trace(decimate.scatter(df_player['absolute_game_position'], df_player['Num Spares'], series_points, trace=trace,
+                                   mode='lines+markers', name='Spares Over Time'))
     
     # Update layout
     fig.update_layout(title=f'Evolution of Strikes and Spares Over Time for Player {player}',
@@ -68,44 +66,56 @@ def generate_combined_strikes_and_spares_evolution_plot(df,player):
 
 
 # Graph generation functions for individual players
-def generate_round_distribution_plot(df,player):
-    df_player = df[df['Hráč'] == player]
-    round_columns = [col for col in df_player.columns if 'kolo' in col and 'Skóre' not in col]
-    round_results = df_player[round_columns].astype(str).apply(pd.Series.value_counts).sum(axis=1).fillna(0)
-    round_results_percentage = (round_results / round_results.sum()) * 100
+def generate_round_distribution_plot(df,player,frame_matrix,player_index=None):
+    # frame_matrix rows line up with the rows of df
+    if player_index is None:
+        player_rows = (df['Hráč'] == player).to_numpy()
+    else:
+        start, stop = player_index.get(player, (0, 0))
+        player_rows = slice(start, stop)
+    return generate_player_result_pie(frames.result_percentages(frame_matrix[player_rows]), player)
+
+# Same pie from percentages that were already taken, e.g. from the cumulative count tables of utils.ranges
+def generate_player_result_pie(round_results_percentage, player):
+    # plotly.express is slow to import, load it with the first figure that needs it
+    import plotly.express as px
     fig = px.pie(values=round_results_percentage, names=round_results_percentage.index,
                  title=f'Distribution of Round Results for Player {player}', hole=0.3)
     return fig
 
-def generate_strikes_evolution_plot(df,player):
-    df_player = df[df['Hráč'] == player]
-    strike_columns_all = [col for col in df_player.columns if 'kolo' in col and 'Skóre' not in col]
-    df_player['Total_Strikes'] = df_player[strike_columns_all].apply(lambda x: (x == 'Strike').sum(), axis=1)
-    fig = go.Figure(go.Scatter(x=df_player['absolute_game_position'], y=df_player['Total_Strikes'],
-                               mode='lines+markers', name='Strikes Over Time'))
+def generate_strikes_evolution_plot(df,player,player_index=None,max_points=decimate.DEFAULT_MAX_POINTS):
+    df_player = data_prep.select_player(df, player, player_index)
+    trace = decimate.trace_class(len(df_player) if max_points is None else min(len(df_player), max_points))
+    fig = go.Figure(decimate.scatter(df_player['absolute_game_position'], df_player['Num Strikes'], max_points, trace=trace,
+                                     mode='lines+markers', name='Strikes Over Time'))
     fig.update_layout(title=f'Evolution of Number of Strikes Over Time for Player {player}',
                       xaxis_title='Absolute Game Position', yaxis_title='Number of Strikes', template='plotly_white')
     return fig
 
-def generate_spares_evolution_plot(df,player):
-    df_player = df[df['Hráč'] == player]
-    strike_columns_all = [col for col in df_player.columns if 'kolo' in col and 'Skóre' not in col]
-    df_player['Total_Spares'] = df_player[strike_columns_all].apply(lambda x: (x == 'Spare').sum(), axis=1)
-    fig = go.Figure(go.Scatter(x=df_player['absolute_game_position'], y=df_player['Total_Spares'],
-                               mode='lines+markers', name='Spares Over Time'))
+def generate_spares_evolution_plot(df,player,player_index=None,max_points=decimate.DEFAULT_MAX_POINTS):
+    df_player = data_prep.select_player(df, player, player_index)
+    trace = decimate.trace_class(len(df_player) if max_points is None else min(len(df_player), max_points))
+    fig = go.Figure(decimate.scatter(df_player['absolute_game_position'], df_player['Num Spares'], max_points, trace=trace,
+                                     mode='lines+markers', name='Spares Over Time'))
     fig.update_layout(title=f'Evolution of Number of Spares Over Time for Player {player}',
                       xaxis_title='Absolute Game Position', yaxis_title='Number of Spares', template='plotly_white')
     return fig
 
-def generate_position_over_time_plot(df,player):
-    df_player = df[df['Hráč'] == player]
+def generate_position_over_time_plot(df,player,player_index=None,max_points=decimate.DEFAULT_MAX_POINTS):
+    df_player = data_prep.select_player(df, player, player_index)
     if 'Rank' not in df_player.columns:
         df_player['Rank'] = df_player.groupby('absolute_game_position')['Skóre 10. kolo'].rank(ascending=False, method='min')
+
+    # Min/max bucketing keeps the best and worst positions of every stretch of games
+    if max_points is not None and len(df_player) > max_points:
+        keep = decimate.downsample(df_player['absolute_game_position'], df_player['Rank'], max_points, method='minmax')
+        df_player = df_player.iloc[keep]
     
+    import plotly.express as px
     fig = px.line(df_player, x='absolute_game_position', y='Rank',
                   title=f'Position Over Time for Player {player}',
                   labels={'absolute_game_position': 'Absolute Game Position', 'Rank': 'Position'},
-                  markers=True)
+                  markers=True, render_mode='webgl' if len(df_player) > decimate.WEBGL_THRESHOLD else 'svg')
     fig.update_yaxes(autorange="reversed")
     fig.update_layout(template='plotly_white')
     return fig
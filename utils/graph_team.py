@@ -1,6 +1,10 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
-import plotly.express as px
+import plotly.colors
+
+from . import decimate
+from . import frames
 
 # Function to generate the cumulative score plot
 def generate_cumulative_score_plot(df,color_dict):
@@ -80,15 +84,21 @@ def generate_total_score_dist(df,binsize):
     return fig
 
 # Function to generate the absolute game score plot
-def generate_absolute_game_score_plot(df,color_dict):
+# max_points is the point budget of the whole figure, shared evenly between players
+def generate_absolute_game_score_plot(df,color_dict,max_points=decimate.DEFAULT_MAX_POINTS):
     fig = go.Figure()
-    for player in df['Hráč'].unique():
+    players = df['Hráč'].unique()
+    player_points = None if max_points is None else max(max_points // max(len(players), 1), 3)
+    trace = decimate.trace_class(len(df) if max_points is None else min(len(df), max_points))
+    for player in players:
         player_data = df[df['Hráč'] == player]
         color = color_dict[player]  # Use the color from the dictionary
 
-        fig.add_trace(go.Scatter(
-            x=player_data['absolute_game_position'],
-            y=player_data['Skóre 10. kolo'],
+        fig.add_trace(decimate.scatter(
+            player_data['absolute_game_position'],
+            player_data['Skóre 10. kolo'],
+            max_points=player_points,
+            trace=trace,
             mode='lines+markers',
             name=player,
             line=dict(color=color)
@@ -102,29 +112,36 @@ def generate_absolute_game_score_plot(df,color_dict):
     )
     return fig
 
-def generate_avg_min_max_plot(avg_min_max_scores):
+def generate_avg_min_max_plot(avg_min_max_scores,max_points=decimate.DEFAULT_MAX_POINTS):
     avg_scores = avg_min_max_scores[0]
     min_scores = avg_min_max_scores[1]
     max_scores = avg_min_max_scores[2]
+
+    # The band is reduced to its per-bucket envelope, the average line with LTTB
+    band_x, band_min, band_max = decimate.envelope(avg_scores.index, min_scores, max_scores, max_points)
+    trace = decimate.trace_class(len(band_x))
+
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=avg_scores.index,
-        y=avg_scores,
+    fig.add_trace(decimate.scatter(
+        avg_scores.index,
+        avg_scores,
+        max_points=max_points,
+        trace=trace,
         mode='lines+markers',
         name='Average Score',
         line=dict(color='blue')
     ))
-    fig.add_trace(go.Scatter(
-        x=avg_scores.index,
-        y=min_scores,
+    fig.add_trace(trace(
+        x=band_x,
+        y=band_min,
         fill=None,
         mode='lines',
         line=dict(color='lightgray', width=0),
         showlegend=False
     ))
-    fig.add_trace(go.Scatter(
-        x=avg_scores.index,
-        y=max_scores,
+    fig.add_trace(trace(
+        x=band_x,
+        y=band_max,
         fill='tonexty',
         mode='lines',
         line=dict(color='lightgray', width=0),
@@ -151,3 +168,55 @@ def generate_result_distribution_pie(round_results_percentage):
         title="Distribution of Round Results"
     )
     return fig
+
+
+# Share of the shared games each player (row) won against each other player (column)
+def generate_head_to_head_heatmap(win_rates):
+    fig = go.Figure(go.Heatmap(
+        z=win_rates.to_numpy() * 100,
+        x=list(win_rates.columns),
+        y=list(win_rates.index),
+        zmin=0,
+        zmax=100,
+        colorscale='RdBu',
+        texttemplate='%{z:.0f} %',
+        colorbar=dict(title='Win %')
+    ))
+    fig.update_layout(
+        title='Head-to-Head Win Rate',
+        xaxis_title='Opponent',
+        yaxis_title='Player',
+        yaxis_autorange='reversed'
+    )
+    return fig
+
+
+# Result distribution stepping through the game days: the frame of a day shows every game up to
+# that day. `cumulative_counts` is (days x results), e.g. RangeStats.cumulative_result_counts();
+# long histories are thinned to `max_frames` evenly spaced days.
+def generate_result_distribution_animation(days, cumulative_counts, title="Distribution of Round Results", max_frames=100):
+    steps = np.unique(np.linspace(0, len(days) - 1, min(max_frames, len(days))).round().astype(int))
+    names = [pd.Timestamp(days[i]).strftime('%d/%m/%Y') for i in steps]
+
+    # Every label stays in every frame, so a result keeps its color while the animation runs
+    def pie(counts):
+        total = counts.sum()
+        values = counts / total * 100 if total else counts.astype(float)
+        return go.Pie(labels=frames.FRAME_LABELS, values=values, hole=0.3, sort=False)
+
+    animation = [go.Frame(data=[pie(cumulative_counts[i])], name=name) for i, name in zip(steps, names)]
+    play = dict(frame=dict(duration=300, redraw=True), transition=dict(duration=0), fromcurrent=True)
+    pause = dict(frame=dict(duration=0, redraw=False), mode='immediate')
+    fig = go.Figure(data=animation[-1].data if animation else [], frames=animation)
+    fig.update_layout(
+        title=title,
+        updatemenus=[dict(type='buttons', showactive=False, x=0, y=0, xanchor='right', yanchor='top', buttons=[
+            dict(label='Play', method='animate', args=[None, play]),
+            dict(label='Pause', method='animate', args=[[None], pause]),
+        ])],
+        sliders=[dict(active=len(animation) - 1, currentvalue=dict(prefix='Up to '), steps=[
+            dict(label=name, method='animate', args=[[name], dict(frame=dict(duration=0, redraw=True), mode='immediate')])
+            for name in names
+        ])]
+    )
+    return fig
@@ -0,0 +1,217 @@
+# utils/head_to_head.py
+import numpy as np
+import pandas as pd
+
+# Head-to-head records of every pair of players over the games both of them played. The scores
+# are pivoted once into a (players x game positions) matrix and the records of all pairs are
+# computed with the prepared data, by broadcasting blocks of player rows against the whole
+# matrix; a block is (rows x players x games), which bounds the peak memory whatever the number
+# of players. The (players x players) records are listed in HeadToHead.ARRAYS, so
+# utils.shared_data publishes them memory-mapped and the workers never compute them. Entry
+# [i, j] is from player i's point of view. A window of game positions is a slice of the
+# columns; only the compared players are broadcast for it, and those records are not kept.
+# Appended games only come after the games each pair already shared, so extend() broadcasts
+# the positions from the first appended one on and continues the records and streaks.
+
+# Marks a game the player did not play, scores are far inside int16
+NOT_PLAYED = -1
+
+# Kinds of records, one (players x players) array each
+RECORDS = ("games", "wins", "losses", "ties", "margin", "longest_streak", "current_streak")
+
+# Cells of one broadcast block, (rows x players x games)
+BLOCK_CELLS = 2 ** 20
+
+
+# The pair comparisons, whatever holds the records; subclasses set `_codes` (player -> code) and
+# give the records of some players, as codes, inside a window of positions
+class Matchups:
+    def _window_records(self, codes, window):
+        raise NotImplementedError
+
+    def _selected(self, players):
+        return [player for player in dict.fromkeys(players) if player in self._codes]
+
+    # One row per pair of the given players, in the order they are given
+    def compare(self, players, window=None):
+        players = self._selected(players)
+        records = self._window_records([self._codes[player] for player in players], window)
+        rows = []
+        for i, player in enumerate(players):
+            for j in range(i + 1, len(players)):
+                rows.append({
+                    "player": player,
+                    "opponent": players[j],
+                    "games": int(records["games"][i, j]),
+                    "wins": int(records["wins"][i, j]),
+                    "losses": int(records["losses"][i, j]),
+                    "ties": int(records["ties"][i, j]),
+                    "margin": float(records["margin"][i, j]),
+                    "longest_streak": int(records["longest_streak"][i, j]),
+                    "opponent_longest_streak": int(records["longest_streak"][j, i]),
+                    "current_streak": int(records["current_streak"][i, j]),
+                    "opponent_current_streak": int(records["current_streak"][j, i]),
+                })
+        return pd.DataFrame(rows, columns=["player", "opponent", "games", "wins", "losses", "ties", "margin", "longest_streak",
+                                           "opponent_longest_streak", "current_streak", "opponent_current_streak"])
+
+    # Share of the shared games each player won against each other, (players x players); NaN
+    # for a player against themselves and for pairs without a shared game
+    def win_rates(self, players, window=None):
+        players = self._selected(players)
+        records = self._window_records([self._codes[player] for player in players], window)
+        games, wins = records["games"], records["wins"]
+        rates = np.divide(wins, games, out=np.full(games.shape, np.nan), where=games > 0)
+        np.fill_diagonal(rates, np.nan)
+        return pd.DataFrame(rates, index=players, columns=players)
+
+
+class HeadToHead(Matchups):
+    # Tables published as memory-mapped .npy files by utils.shared_data
+    ARRAYS = ("positions", "scores") + RECORDS
+
+    # `games` has the columns 'Hráč', 'absolute_game_position' and 'Skóre 10. kolo'; games
+    # without a date have no position and are left out
+    def __init__(self, games):
+        games = _dated(games)
+        played = games['Skóre 10. kolo'].notna().to_numpy()
+        player_codes, self.players = pd.factorize(games['Hráč'], sort=True)
+        self.positions, position_codes = np.unique(games['absolute_game_position'].to_numpy(), return_inverse=True)
+        self.scores = np.full((len(self.players), len(self.positions)), NOT_PLAYED, dtype=np.int16)
+        self.scores[player_codes[played], position_codes[played]] = games['Skóre 10. kolo'].to_numpy()[played]
+        self._codes = {player: i for i, player in enumerate(self.players)}
+        records = _blocked_records(self.scores)
+        for name in RECORDS:
+            setattr(self, name, records[name])
+
+    @property
+    def records(self):
+        return {name: getattr(self, name) for name in RECORDS}
+
+    # Records of the given players (as codes) inside the window of positions, indexed like `codes`
+    def _window_records(self, codes, window):
+        if window is None:
+            return {name: values[np.ix_(codes, codes)] for name, values in self.records.items()}
+        lo = np.searchsorted(self.positions, window[0], side='left')
+        hi = np.searchsorted(self.positions, window[1], side='right')
+        return window_records(self.scores[codes, lo:hi])
+
+    # A new HeadToHead with `games` appended, each after the last game of its player; self is
+    # left as it is, it may still be served
+    def extend(self, games):
+        games = _dated(games)
+        played = games['Skóre 10. kolo'].notna().to_numpy()
+        players = pd.factorize(pd.concat([pd.Series(self.players), games['Hráč']]), sort=True)[1]
+        positions = np.union1d(self.positions, games['absolute_game_position'].to_numpy())
+        # Columns before the first appended position are where they were
+        start = np.searchsorted(positions, games['absolute_game_position'].min()) if len(games) else len(positions)
+        old_rows = players.get_indexer(self.players)
+
+        scores = np.full((len(players), len(positions)), NOT_PLAYED, dtype=np.int16)
+        scores[old_rows, :start] = self.scores[:, :start]
+        scores[np.ix_(old_rows, np.searchsorted(positions, self.positions[start:]))] = self.scores[:, start:]
+        player_codes = players.get_indexer(games['Hráč'])[played]
+        position_codes = np.searchsorted(positions, games['absolute_game_position'].to_numpy())[played]
+        scores[player_codes, position_codes] = games['Skóre 10. kolo'].to_numpy()[played]
+        fresh = np.zeros((len(players), len(positions) - start), dtype=bool)
+        fresh[player_codes, position_codes - start] = True
+
+        def widen(values, fill):
+            wide = np.full((len(players), len(players)), fill, dtype=values.dtype)
+            wide[np.ix_(old_rows, old_rows)] = values
+            return wide
+
+        old = {name: widen(values, np.nan if name == "margin" else 0) for name, values in self.records.items()}
+        new = extension_records(scores[:, start:], fresh, old["current_streak"])
+        games_count = old["games"] + new["games"]
+        # The margins are averages of whole points, so the totals come back exactly
+        margin_total = np.where(old["games"] > 0, np.rint(old["margin"] * old["games"]), 0) + new["margin_total"]
+        streak_dtype = _streak_dtype(len(positions))
+
+        extended = HeadToHead.__new__(HeadToHead)
+        extended.players = players
+        extended.positions = positions
+        extended.scores = scores
+        extended._codes = {player: i for i, player in enumerate(players)}
+        extended.games = games_count
+        extended.wins = old["wins"] + new["wins"]
+        extended.losses = old["losses"] + new["losses"]
+        extended.ties = old["ties"] + new["ties"]
+        extended.margin = np.divide(margin_total, games_count, out=np.full(games_count.shape, np.nan), where=games_count > 0)
+        extended.longest_streak = np.maximum(old["longest_streak"], new["longest_streak"]).astype(streak_dtype)
+        extended.current_streak = new["current_streak"].astype(streak_dtype)
+        return extended
+
+
+def _dated(games):
+    dated = games['absolute_game_position'].notna().to_numpy()
+    return games if dated.all() else games[dated]
+
+
+# Streak counts fit int16 while there are fewer games than that
+def _streak_dtype(n_games):
+    if not n_games:
+        return np.int64
+    return np.int16 if n_games < 2 ** 15 else np.int32
+
+
+# Records of every row of `rows` against every row of `scores`, both (players x games) score
+# matrices over the same games; (rows x players) each. With `fresh_rows` and `fresh`, marking the
+# appended games of both, only games where one of the pair is fresh count, and the streaks go on
+# from `current` (rows x players). margin_total is the sum of the margins.
+def _records(rows, scores, fresh_rows=None, fresh=None, current=None):
+    played = scores != NOT_PLAYED
+    both = (rows != NOT_PLAYED)[:, None, :] & played[None, :, :]
+    if fresh is not None:
+        both &= fresh_rows[:, None, :] | fresh[None, :, :]
+    margin = np.where(both, rows[:, None, :] - scores[None, :, :], 0)
+    wins = both & (margin > 0)
+    games = both.sum(axis=-1)
+    win_count = wins.sum(axis=-1)
+    loss_count = (both & (margin < 0)).sum(axis=-1)
+
+    # Win streaks count the shared games only: `running` is the number of wins so far, and
+    # every shared game that is not a win restarts the streak at the count it had then
+    if not scores.shape[1]:
+        longest = current = np.zeros(games.shape, dtype=np.int64) if current is None else current.copy()
+    else:
+        if current is None:
+            running = np.cumsum(wins, axis=-1, dtype=_streak_dtype(scores.shape[1]))
+        else:
+            running = np.cumsum(wins, axis=-1, dtype=np.int64) + current[..., None]
+        streak = running - np.maximum.accumulate(np.where(both & ~wins, running, 0), axis=-1)
+        # A copy, a view of the last column would keep the whole block alive
+        longest, current = streak.max(axis=-1), streak[..., -1].copy()
+
+    margin_total = margin.sum(axis=-1)
+    return {
+        "games": games,
+        "wins": win_count,
+        "losses": loss_count,
+        "ties": games - win_count - loss_count,
+        "margin": np.divide(margin_total, games, out=np.full(games.shape, np.nan), where=games > 0),
+        "longest_streak": longest,
+        "current_streak": current,
+        "margin_total": margin_total,
+    }
+
+
+# Records of every pair of the players of a few (players x games) scores, as of a window
+def window_records(scores):
+    return _records(scores, scores)
+
+
+# Records of every pair of players, broadcasting at most BLOCK_CELLS cells at a time
+def _blocked_records(scores, block_cells=BLOCK_CELLS, fresh=None, current=None):
+    rows = max(1, block_cells // max(scores.size, 1))
+    blocks = [_records(scores[i:i + rows], scores, *(() if fresh is None else (fresh[i:i + rows], fresh, current[i:i + rows])))
+              for i in range(0, len(scores), rows)] or [_records(scores, scores, fresh, fresh, current)]
+    return {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
+
+
+# Records of the games appended to a history, to add to the records so far. `scores` (players x
+# games) holds every game from the first appended position on, `fresh` marks the appended ones
+# and `current` is the current streak of every pair so far. A pair only gets the games where one
+# of them is fresh: those all come after the games the pair shared before.
+def extension_records(scores, fresh, current, block_cells=BLOCK_CELLS):
+    return _blocked_records(scores, block_cells, fresh, current)
@@ -0,0 +1,577 @@
+# utils/history.py
+#
+# Optional SQLite backend for the league history. The sheet rows are persisted as they are
+# appended, together with one typed row per game and aggregate tables that are updated from
+# the new rows only. Callbacks query the games of one player or the aggregates they need
+# instead of keeping the whole prepared history in memory, and the stored sheet rows are the
+# local source when Google Sheets is unavailable.
+import json
+import sqlite3
+import threading
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from . import data_prep
+from . import frames
+from . import head_to_head
+from . import leaderboard
+from . import metrics
+from . import ranges
+from . import snapshot
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+-- The sheet as it was downloaded, one JSON object per row
+CREATE TABLE IF NOT EXISTS sheet_rows (
+    row_id INTEGER PRIMARY KEY,
+    hash INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    row_id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    day TEXT NOT NULL,
+    venue TEXT,
+    game_no INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    score INTEGER,
+    strikes INTEGER NOT NULL,
+    spares INTEGER NOT NULL,
+    frames BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_player ON games (player, position);
+CREATE INDEX IF NOT EXISTS games_day ON games (day);
+CREATE INDEX IF NOT EXISTS games_position ON games (position, score);
+-- First absolute game position and number of games of every game day
+CREATE TABLE IF NOT EXISTS days (
+    day TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    games INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS position_stats (
+    position INTEGER PRIMARY KEY,
+    total INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    min_score INTEGER,
+    max_score INTEGER
+);
+CREATE TABLE IF NOT EXISTS player_stats (
+    player TEXT PRIMARY KEY,
+    first_row INTEGER NOT NULL,
+    best INTEGER,
+    worst INTEGER,
+    total INTEGER NOT NULL,
+    games INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS result_counts (
+    player TEXT NOT NULL,
+    result INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (player, result)
+);
+-- Sums, best and worst game of every player and game day, for the date range statistics;
+-- games counts the games with a score
+CREATE TABLE IF NOT EXISTS player_days (
+    player TEXT NOT NULL,
+    day TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    total_sq INTEGER NOT NULL,
+    strikes INTEGER NOT NULL,
+    spares INTEGER NOT NULL,
+    best INTEGER,
+    worst INTEGER,
+    PRIMARY KEY (player, day)
+);
+CREATE INDEX IF NOT EXISTS player_days_day ON player_days (day);
+CREATE TABLE IF NOT EXISTS player_day_results (
+    player TEXT NOT NULL,
+    day TEXT NOT NULL,
+    result INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (player, day, result)
+);
+CREATE INDEX IF NOT EXISTS player_day_results_day ON player_day_results (day);
+-- Head-to-head record of every pair of players with a shared game, from the player's point of
+-- view, as in head_to_head.HeadToHead
+CREATE TABLE IF NOT EXISTS head_to_head (
+    player TEXT NOT NULL,
+    opponent TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    ties INTEGER NOT NULL,
+    margin_total INTEGER NOT NULL,
+    longest_streak INTEGER NOT NULL,
+    current_streak INTEGER NOT NULL,
+    PRIMARY KEY (player, opponent)
+);
+CREATE VIEW IF NOT EXISTS avg_min_max AS
+    SELECT position, CAST(total AS REAL) / games AS average, min_score, max_score
+    FROM position_stats WHERE games > 0 ORDER BY position;
+CREATE VIEW IF NOT EXISTS player_summary AS
+    SELECT player, best, worst, total, games, CAST(total AS REAL) / games AS average
+    FROM player_stats ORDER BY player;
+"""
+
+DATA_TABLES = ("sheet_rows", "games", "days", "position_stats", "player_stats", "result_counts", "player_days",
+               "player_day_results", "head_to_head")
+
+# Stores of an older version get the aggregates added since by replaying their stored sheet
+SCHEMA_VERSION = 3
+
+# Both aggregates ignore scores that are missing, like pandas does
+UPSERT_POSITION = """
+INSERT INTO position_stats (position, total, games, min_score, max_score) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (position) DO UPDATE SET
+    total = total + excluded.total,
+    games = games + excluded.games,
+    min_score = coalesce(min(min_score, excluded.min_score), min_score, excluded.min_score),
+    max_score = coalesce(max(max_score, excluded.max_score), max_score, excluded.max_score)
+"""
+UPSERT_PLAYER = """
+INSERT INTO player_stats (player, first_row, best, worst, total, games) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (player) DO UPDATE SET
+    best = coalesce(max(best, excluded.best), best, excluded.best),
+    worst = coalesce(min(worst, excluded.worst), worst, excluded.worst),
+    total = total + excluded.total,
+    games = games + excluded.games
+"""
+UPSERT_RESULT = """
+INSERT INTO result_counts (player, result, count) VALUES (?, ?, ?)
+ON CONFLICT (player, result) DO UPDATE SET count = count + excluded.count
+"""
+UPSERT_PLAYER_DAY = """
+INSERT INTO player_days (player, day, games, total, total_sq, strikes, spares, best, worst) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (player, day) DO UPDATE SET
+    games = games + excluded.games,
+    total = total + excluded.total,
+    total_sq = total_sq + excluded.total_sq,
+    strikes = strikes + excluded.strikes,
+    spares = spares + excluded.spares,
+    best = coalesce(max(best, excluded.best), best, excluded.best),
+    worst = coalesce(min(worst, excluded.worst), worst, excluded.worst)
+"""
+UPSERT_PLAYER_DAY_RESULT = """
+INSERT INTO player_day_results (player, day, result, count) VALUES (?, ?, ?, ?)
+ON CONFLICT (player, day, result) DO UPDATE SET count = count + excluded.count
+"""
+# The streaks of the new games already go on from the stored current streak
+UPSERT_HEAD_TO_HEAD = """
+INSERT INTO head_to_head (player, opponent, games, wins, losses, ties, margin_total, longest_streak, current_streak)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (player, opponent) DO UPDATE SET
+    games = games + excluded.games,
+    wins = wins + excluded.wins,
+    losses = losses + excluded.losses,
+    ties = ties + excluded.ties,
+    margin_total = margin_total + excluded.margin_total,
+    longest_streak = max(longest_streak, excluded.longest_streak),
+    current_streak = excluded.current_streak
+"""
+
+# Rank as in prepare_data (method='min'): one more than the games with a higher score at that position
+PLAYER_GAMES = """
+SELECT g.player, g.day, g.venue, g.game_no, g.score, g.strikes, g.spares, g.position,
+       CASE WHEN g.score IS NULL THEN NULL
+            ELSE 1 + (SELECT COUNT(*) FROM games o WHERE o.position = g.position AND o.score > g.score) END,
+       g.frames
+FROM games g WHERE g.player = ? ORDER BY g.position, g.row_id
+"""
+
+GAME_COLUMNS = ['Hráč', 'Den', 'Podnik', 'Pořadové č. hry', 'Skóre 10. kolo', 'Num Strikes', 'Num Spares',
+                'absolute_game_position']
+
+
+def _value(value):
+    # sqlite3 only takes plain Python values; missing ones become NULL
+    if value is None or value is pd.NaT or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+# Number of frames with each result per group of rows, (groups x results)
+def _result_counts(group_codes, n_groups, codes):
+    valid = codes != frames.MISSING
+    counts = np.zeros((n_groups, len(frames.FRAME_LABELS)), dtype=np.int64)
+    np.add.at(counts, (np.broadcast_to(group_codes[:, None], codes.shape)[valid], codes[valid]), 1)
+    return counts
+
+
+def _json_default(value):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class HistoryStore:
+    def __init__(self, path):
+        self.path = path
+        self._write_lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            with conn:
+                self._migrate(conn)
+
+    # One connection per call, so callbacks on several threads never share one
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _meta(self, conn, key, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    # Bumped on every change, so unchanged syncs can be told apart cheaply
+    def revision(self):
+        with closing(self._connect()) as conn:
+            return self._meta(conn, "revision", 0)
+
+    def row_count(self):
+        return self._query("SELECT COUNT(*) FROM sheet_rows")[0][0]
+
+    # Store the current sheet. Appended rows only touch the aggregates of their players, days
+    # and positions; when earlier rows changed or a game day was backfilled, the store is
+    # rebuilt from the sheet. Returns whether anything changed.
+    def sync(self, raw_df):
+        raw_df = raw_df.reset_index(drop=True)
+        hashes = pd.util.hash_pandas_object(raw_df, index=False).to_numpy().view(np.int64)
+        with self._write_lock, metrics.timer("bowling_history_sync_seconds", "Time to sync the sheet into the history store"), \
+                closing(self._connect()) as conn, conn:
+            stored = np.fromiter((h for (h,) in conn.execute("SELECT hash FROM sheet_rows ORDER BY row_id")), dtype=np.int64)
+            n = len(stored)
+            same_prefix = (self._meta(conn, "columns") == list(raw_df.columns) and len(raw_df) >= n
+                           and np.array_equal(hashes[:n], stored))
+            if same_prefix and len(raw_df) == n:
+                return False
+            if not same_prefix or not self._append(conn, raw_df.iloc[n:], n, hashes[n:]):
+                for table in DATA_TABLES:
+                    conn.execute(f"DELETE FROM {table}")
+                self._set_meta(conn, "columns", list(raw_df.columns))
+                self._append(conn, raw_df, 0, hashes)
+            self._set_meta(conn, "revision", self._meta(conn, "revision", 0) + 1)
+            return True
+
+    # Rebuild the data tables of a store written by an older version from its stored sheet rows
+    def _migrate(self, conn):
+        if self._meta(conn, "schema", 1) >= SCHEMA_VERSION:
+            return
+        rows = conn.execute("SELECT hash, data FROM sheet_rows ORDER BY row_id").fetchall()
+        if rows:
+            raw_df = snapshot.type_columns(pd.DataFrame.from_records([json.loads(data) for _, data in rows],
+                                                                     columns=self._meta(conn, "columns", [])))
+            for table in DATA_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+            self._append(conn, raw_df, 0, np.array([h for h, _ in rows], dtype=np.int64))
+        self._set_meta(conn, "schema", SCHEMA_VERSION)
+
+    # Insert sheet rows from `first_row` on. Returns False when they start before the last
+    # stored game day, which would shift the positions of later days.
+    def _append(self, conn, rows, first_row, hashes):
+        df, codes, round_columns = data_prep.prepare_rows(rows.reset_index(drop=True))
+        df.index += first_row
+        last = conn.execute("SELECT day, offset, games FROM days ORDER BY day DESC LIMIT 1").fetchone()
+        placed = df['Den'].notna().to_numpy()
+        if last is not None and placed.any() and df.loc[placed, 'Den'].min() < pd.Timestamp(last[0]):
+            return False
+
+        # Absolute positions continue from the last game day, as in prepare_data
+        games_per_date = df.loc[placed].groupby('Den')['Pořadové č. hry'].max()
+        offset = 0
+        if last is not None:
+            last_day = pd.Timestamp(last[0])
+            offset = last[1]
+            games_per_date.loc[last_day] = max(last[2], games_per_date.get(last_day, 0))
+            games_per_date = games_per_date.sort_index()
+        date_offsets = offset + games_per_date.cumsum().shift(fill_value=0)
+        df['absolute_game_position'] = df['Den'].map(date_offsets) + df['Pořadové č. hry']
+
+        conn.executemany("INSERT INTO sheet_rows (row_id, hash, data) VALUES (?, ?, ?)", [
+            (first_row + i, int(h), json.dumps(record, ensure_ascii=False, default=_json_default))
+            for i, (h, record) in enumerate(zip(hashes, rows.to_dict('records')))])
+        conn.executemany("INSERT OR REPLACE INTO days (day, offset, games) VALUES (?, ?, ?)", [
+            (day.date().isoformat(), int(date_offsets[day]), int(games)) for day, games in games_per_date.items()])
+
+        df, codes = df[placed], codes[placed]
+        if not len(df):
+            return True
+        conn.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            (int(row_id), player, day.date().isoformat(), _value(venue), int(game_no), int(position), _value(score),
+             int(strikes), int(spares), code_row.tobytes())
+            for row_id, player, day, venue, game_no, position, score, strikes, spares, code_row in zip(
+                df.index, df['Hráč'], df['Den'], df['Podnik'], df['Pořadové č. hry'], df['absolute_game_position'],
+                df['Skóre 10. kolo'], df['Num Strikes'], df['Num Spares'], codes)])
+
+        scores = df['Skóre 10. kolo']
+        by_position = scores.groupby(df['absolute_game_position'])
+        conn.executemany(UPSERT_POSITION, [
+            tuple(_value(v) for v in row) for row in zip(by_position.sum().index, by_position.sum(), by_position.count(),
+                                                          by_position.min(), by_position.max())])
+        by_player = scores.groupby(df['Hráč'])
+        first_rows = pd.Series(df.index, index=df.index).groupby(df['Hráč']).min()
+        conn.executemany(UPSERT_PLAYER, [
+            tuple(_value(v) for v in row) for row in zip(by_player.sum().index, first_rows, by_player.max(), by_player.min(),
+                                                          by_player.sum(), by_player.count())])
+        player_codes, player_names = pd.factorize(df['Hráč'])
+        counts = _result_counts(player_codes, len(player_names), codes)
+        conn.executemany(UPSERT_RESULT, [(player_names[i], int(result), int(counts[i, result]))
+                                         for i, result in zip(*np.nonzero(counts))])
+
+        days = df['Den'].dt.strftime('%Y-%m-%d')
+        by_player_day = df.assign(day=days, score_sq=scores * scores).groupby(['Hráč', 'day'], sort=False)
+        sums = by_player_day.agg(games=('Skóre 10. kolo', 'count'), total=('Skóre 10. kolo', 'sum'),
+                                 total_sq=('score_sq', 'sum'), strikes=('Num Strikes', 'sum'), spares=('Num Spares', 'sum'),
+                                 best=('Skóre 10. kolo', 'max'), worst=('Skóre 10. kolo', 'min'))
+        conn.executemany(UPSERT_PLAYER_DAY, [tuple(_value(v) for v in (player, day) + row)
+                                             for (player, day), row in zip(sums.index, sums.itertuples(index=False))])
+        counts = _result_counts(by_player_day.ngroup().to_numpy(), len(sums), codes)
+        conn.executemany(UPSERT_PLAYER_DAY_RESULT, [(*sums.index[i], int(result), int(counts[i, result]))
+                                                    for i, result in zip(*np.nonzero(counts))])
+        self._extend_head_to_head(conn, df, first_row)
+        self._set_meta(conn, "frame_columns", round_columns)
+        return True
+
+    # Add the games of `df`, the rows from `first_row` on, to the head-to-head records. Only the
+    # stored games from the first new position on are read, to pair them with the new ones.
+    def _extend_head_to_head(self, conn, df, first_row):
+        df = df[df['Skóre 10. kolo'].notna()]
+        if not len(df):
+            return
+        stored = conn.execute("SELECT player, position, score FROM games WHERE position >= ? AND row_id < ? "
+                              "AND score IS NOT NULL", (int(df['absolute_game_position'].min()), first_row)).fetchall()
+        player_codes, players = pd.factorize(np.concatenate([np.array([player for player, _, _ in stored], dtype=object),
+                                                             df['Hráč'].to_numpy(dtype=object)]))
+        positions, position_codes = np.unique(np.concatenate([np.array([position for _, position, _ in stored], dtype=np.int64),
+                                                              df['absolute_game_position'].to_numpy(dtype=np.int64)]),
+                                              return_inverse=True)
+        scores = np.full((len(players), len(positions)), head_to_head.NOT_PLAYED, dtype=np.int16)
+        scores[player_codes, position_codes] = np.concatenate([np.array([score for _, _, score in stored], dtype=np.int16),
+                                                               df['Skóre 10. kolo'].to_numpy(dtype=np.int16)])
+        fresh = np.zeros(scores.shape, dtype=bool)
+        fresh[player_codes[len(stored):], position_codes[len(stored):]] = True
+
+        codes = {player: i for i, player in enumerate(players)}
+        current = np.zeros((len(players), len(players)), dtype=np.int64)
+        for player, opponent, streak in conn.execute("SELECT player, opponent, current_streak FROM head_to_head"):
+            if player in codes and opponent in codes:
+                current[codes[player], codes[opponent]] = streak
+        records = head_to_head.extension_records(scores, fresh, current)
+        conn.executemany(UPSERT_HEAD_TO_HEAD, [
+            (players[i], players[j], *(int(records[name][i, j]) for name in
+                                       ("games", "wins", "losses", "ties", "margin_total", "longest_streak", "current_streak")))
+            for i, j in zip(*np.nonzero(records["games"]))])
+
+    # The stored sheet, in the same shape as utils.sheets.load_raw_data returns it
+    def read_sheet(self):
+        with closing(self._connect()) as conn:
+            columns = self._meta(conn, "columns", [])
+            records = [json.loads(data) for (data,) in conn.execute("SELECT data FROM sheet_rows ORDER BY row_id")]
+        return snapshot.type_columns(pd.DataFrame.from_records(records, columns=columns))
+
+    # Wrap a sheet loader: every loaded sheet is synced into the store, and when loading fails
+    # the stored sheet is returned instead
+    def loader(self, load):
+        def load_with_history():
+            try:
+                raw_df = load()
+            except Exception:
+                if self.row_count():
+                    return self.read_sheet()
+                raise
+            self.sync(raw_df)
+            return raw_df
+        return load_with_history
+
+    # Players in the order they first appear in the sheet
+    def players(self):
+        return np.array([player for (player,) in self._query("SELECT player FROM player_stats ORDER BY first_row")],
+                        dtype=object)
+
+    # Same columns and index as data_prep.build_player_summary
+    def player_summary(self):
+        rows = self._query("SELECT player, best, worst, total, games, average FROM player_summary")
+        return pd.DataFrame(rows, columns=['Hráč', 'best', 'worst', 'total', 'games', 'average']).set_index('Hráč')
+
+    # [average, min, max] per absolute game position, as in prepare_data
+    def avg_min_max_scores(self):
+        rows = self._query("SELECT position, average, min_score, max_score FROM avg_min_max")
+        table = pd.DataFrame(rows, columns=['absolute_game_position', 'average', 'min', 'max']).set_index('absolute_game_position')
+        return [table[column].rename('Skóre 10. kolo') for column in ('average', 'min', 'max')]
+
+    # Number of frames with each result, of one player or of everybody
+    def result_counts(self, player=None):
+        if player is None:
+            rows = self._query("SELECT result, SUM(count) FROM result_counts GROUP BY result")
+        else:
+            rows = self._query("SELECT result, count FROM result_counts WHERE player = ?", (player,))
+        counts = pd.Series(0, index=frames.FRAME_LABELS)
+        for result, count in rows:
+            counts.iloc[result] = count
+        return counts
+
+    # One player's games in order, with their rank at every position, and their frame matrix
+    def player_games(self, player):
+        rows = self._query(PLAYER_GAMES, (player,))
+        with closing(self._connect()) as conn:
+            n_frames = len(self._meta(conn, "frame_columns", []))
+        df = pd.DataFrame([row[:-1] for row in rows], columns=GAME_COLUMNS + ['Rank'])
+        df['Den'] = pd.to_datetime(df['Den'])
+        df['Rank'] = df['Rank'].astype(float)
+        frame_matrix = np.frombuffer(b"".join(row[-1] for row in rows), dtype=np.int8).reshape(len(rows), n_frames)
+        return df, frame_matrix
+
+    # Player, position and score of every game, sorted like the prepared df, for the team graphs
+    def games(self):
+        rows = self._query("SELECT player, position, score FROM games ORDER BY player, position, row_id")
+        return pd.DataFrame(rows, columns=['Hráč', 'absolute_game_position', 'Skóre 10. kolo'])
+
+    # Rows of the last game day in sheet order, for data_prep.last_game_summary
+    def last_game_rows(self):
+        rows = self._query("SELECT player, day, venue, game_no, score, strikes, spares, position "
+                           "FROM games WHERE day = (SELECT MAX(day) FROM games) ORDER BY row_id")
+        df = pd.DataFrame(rows, columns=GAME_COLUMNS)
+        df['Den'] = pd.to_datetime(df['Den'])
+        return df
+
+    # Prepare step for refresh.DataRefresher: the store is already synced by loader(), so only
+    # the small summaries are kept in memory and the callbacks query the rest from the store
+    def prepare(self, raw_df, previous=None):
+        revision = self.revision()
+        if previous is not None and previous.get("history_revision") == revision:
+            return None
+        players = self.players()
+        player_summary = self.player_summary()
+        last_rows = self.last_game_rows()
+        board = leaderboard.Leaderboard.from_summary(player_summary, last_rows)
+        return {
+            "players": players,
+            **data_prep.last_game_summary(last_rows),
+            "round_results_percentage": frames.percentages(self.result_counts()),
+            "color_dict": data_prep.player_colors(players),
+            "player_summary": player_summary,
+            "team_summary": data_prep.build_team_summary(player_summary),
+            "leaderboard": board,
+            "leaderboard_snapshot": board.snapshot(),
+            "ranges": HistoryRanges(self),
+            "head_to_head": HistoryHeadToHead(self),
+            "history": self,
+            "history_revision": revision
+        }
+
+
+# Date range statistics of the store, with the interface of ranges.RangeStats. Only the game days
+# are kept in memory; every statistic is one query of the aggregates per player and game day.
+class HistoryRanges(ranges.GameDays):
+    def __init__(self, store):
+        self.store = store
+        rows = store._query("SELECT day, MIN(position), MAX(position) FROM games GROUP BY day ORDER BY day")
+        self.day_names = [day for day, _, _ in rows]
+        self.days = pd.DatetimeIndex(pd.to_datetime(self.day_names), name='Den')
+        self.day_first = np.array([first for _, first, _ in rows], dtype=np.int64)
+        self.day_last = np.array([last for _, _, last in rows], dtype=np.int64)
+
+    # First and last day of the window, as stored, or None for a window without game days
+    def _day_range(self, window):
+        first, stop = self.day_span(window)
+        return (self.day_names[first], self.day_names[stop - 1]) if first < stop else None
+
+    def _stats_rows(self, window, player=None):
+        day_range = self._day_range(window)
+        if day_range is None:
+            return []
+        sql = ("SELECT player, SUM(games), SUM(total), SUM(total_sq), SUM(strikes), SUM(spares), MAX(best), MIN(worst) "
+               "FROM player_days WHERE day BETWEEN ? AND ?")
+        if player is not None:
+            return self.store._query(sql + " AND player = ? GROUP BY player", day_range + (player,))
+        return self.store._query(sql + " GROUP BY player ORDER BY player", day_range)
+
+    @staticmethod
+    def _stats(row):
+        sums = dict(zip(ranges.FIELDS, (row[2], row[3], row[4], row[5], row[1])))
+        return ranges.summary_stats(sums, row[6], row[7]) if sums["games"] else ranges.summary_stats(sums, None, None)
+
+    # Sums, average, variance, best and worst game of a player inside the window
+    def player_stats(self, player, window=None):
+        rows = self._stats_rows(window, player)
+        return self._stats(rows[0] if rows else (player, 0, 0, 0, 0, 0, None, None))
+
+    def _all_player_stats(self, window):
+        return [(row[0], self._stats(row)) for row in self._stats_rows(window)]
+
+    # Number of frames with each result inside the window, for one player or the whole team
+    def result_counts(self, player=None, window=None):
+        counts = pd.Series(0, index=frames.FRAME_LABELS, dtype=np.int64)
+        day_range = self._day_range(window)
+        if day_range is None:
+            return counts
+        sql = "SELECT result, SUM(count) FROM player_day_results WHERE day BETWEEN ? AND ?"
+        if player is None:
+            rows = self.store._query(sql + " GROUP BY result", day_range)
+        else:
+            rows = self.store._query(sql + " AND player = ? GROUP BY result", day_range + (player,))
+        for result, count in rows:
+            counts.iloc[result] = count
+        return counts
+
+    # Result counts of everything up to the end of every game day, (days x results)
+    def cumulative_result_counts(self, player=None):
+        sql = "SELECT day, result, SUM(count) FROM player_day_results"
+        if player is None:
+            rows = self.store._query(sql + " GROUP BY day, result")
+        else:
+            rows = self.store._query(sql + " WHERE player = ? GROUP BY day, result", (player,))
+        day_index = {day: i for i, day in enumerate(self.day_names)}
+        counts = np.zeros((len(self.day_names), len(frames.FRAME_LABELS)), dtype=np.int64)
+        for day, result, count in rows:
+            counts[day_index[day], result] = count
+        return np.cumsum(counts, axis=0)
+
+
+# Head-to-head records of the store, with the interface of head_to_head.HeadToHead. The records of
+# all games are read from the head_to_head table; for a window of days only the compared
+# players' games inside it are queried and compared.
+class HistoryHeadToHead(head_to_head.Matchups):
+    def __init__(self, store):
+        self.store = store
+        self.players = [player for (player,) in store._query("SELECT player FROM player_stats ORDER BY player")]
+        self._codes = {player: i for i, player in enumerate(self.players)}
+
+    def _window_records(self, codes, window):
+        names = [self.players[code] for code in codes]
+        placeholders = ", ".join("?" * len(names))
+        index = {player: i for i, player in enumerate(names)}
+        if window is None:
+            records = {name: np.zeros((len(names), len(names)), dtype=np.int64) for name in head_to_head.RECORDS}
+            records["margin"] = np.full((len(names), len(names)), np.nan)
+            rows = self.store._query(
+                "SELECT player, opponent, games, wins, losses, ties, CAST(margin_total AS REAL) / games, longest_streak, "
+                f"current_streak FROM head_to_head WHERE player IN ({placeholders}) AND opponent IN ({placeholders})",
+                names + names)
+            for player, opponent, *values in rows:
+                for name, value in zip(head_to_head.RECORDS, values):
+                    records[name][index[player], index[opponent]] = value
+            return records
+        rows = self.store._query(
+            f"SELECT player, position, score FROM games WHERE player IN ({placeholders}) AND position BETWEEN ? AND ? "
+            "AND score IS NOT NULL", names + [int(window[0]), int(window[1])])
+        positions, position_codes = np.unique(np.array([position for _, position, _ in rows], dtype=np.int64),
+                                              return_inverse=True)
+        scores = np.full((len(names), len(positions)), head_to_head.NOT_PLAYED, dtype=np.int16)
+        scores[[index[player] for player, _, _ in rows], position_codes] = [score for _, _, score in rows]
+        return head_to_head.window_records(scores)
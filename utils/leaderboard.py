@@ -0,0 +1,191 @@
+# utils/leaderboard.py
+import copy
+import random
+
+import pandas as pd
+
+# Rankings of the leaderboard and their titles. 'average' normalizes the total by the games a
+# player played, 'last' ranks the average of the players at the last game day.
+RANKINGS = {
+    "total": "Total score",
+    "average": "Average per game",
+    "best": "Best game",
+    "last": "Last game day",
+}
+
+TOP_K = 10
+
+
+# Order-statistic tree: a treap whose nodes know the size of their subtree. Insert, remove,
+# rank and k-th key are O(log n) expected. Nodes are lists [key, priority, left, right, size].
+class OrderStatisticTree:
+    def __init__(self, seed=0):
+        self._root = None
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return _size(self._root)
+
+    def insert(self, key):
+        left, right = _split(self._root, key)
+        node = [key, self._random.random(), None, None, 1]
+        self._root = _merge(_merge(left, node), right)
+
+    def remove(self, key):
+        left, right = _split(self._root, key)
+        _, right = _split(right, key, inclusive=True)
+        self._root = _merge(left, right)
+
+    # Number of keys smaller than `key`
+    def rank(self, key):
+        node, count = self._root, 0
+        while node is not None:
+            if node[0] < key:
+                count += _size(node[2]) + 1
+                node = node[3]
+            else:
+                node = node[2]
+        return count
+
+    # The k-th smallest key, from 0
+    def select(self, k):
+        node = self._root
+        while node is not None:
+            left = _size(node[2])
+            if k < left:
+                node = node[2]
+            elif k == left:
+                return node[0]
+            else:
+                k -= left + 1
+                node = node[3]
+        raise IndexError(k)
+
+    def smallest(self, k):
+        return [self.select(i) for i in range(min(k, len(self)))]
+
+
+def _size(node):
+    return node[4] if node is not None else 0
+
+
+def _update(node):
+    node[4] = 1 + _size(node[2]) + _size(node[3])
+    return node
+
+
+# Split into (keys < key, keys >= key), or (keys <= key, keys > key) when inclusive
+def _split(node, key, inclusive=False):
+    if node is None:
+        return None, None
+    if node[0] < key or (inclusive and node[0] == key):
+        left, right = _split(node[3], key, inclusive)
+        node[3] = left
+        return _update(node), right
+    left, right = _split(node[2], key, inclusive)
+    node[2] = right
+    return left, _update(node)
+
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left[1] > right[1]:
+        left[3] = _merge(left[3], right)
+        return _update(left)
+    right[2] = _merge(left, right[2])
+    return _update(right)
+
+
+# Player rankings, kept up to date as games arrive. Every ranking is an order-statistic tree of
+# (-value, player) keys, so the best player comes first and ties go by name. Updating a player
+# and asking for a rank or the top K are O(log players).
+class Leaderboard:
+    def __init__(self):
+        self.stats = {}
+        self.last_day = None
+        self.last = {}
+        self.trees = {name: OrderStatisticTree() for name in RANKINGS}
+        self._keys = {name: {} for name in RANKINGS}
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    def _set(self, name, player, value):
+        keys = self._keys[name]
+        if player in keys:
+            self.trees[name].remove(keys.pop(player))
+        if value is not None:
+            keys[player] = (-value, player)
+            self.trees[name].insert(keys[player])
+
+    def _add_totals(self, player, total, games, best):
+        if not games:
+            return
+        stats = self.stats.setdefault(player, {"total": 0, "games": 0, "best": None})
+        stats["total"] += total
+        stats["games"] += games
+        stats["best"] = best if stats["best"] is None else max(stats["best"], best)
+        self._set("total", player, stats["total"])
+        self._set("average", player, stats["total"] / stats["games"])
+        self._set("best", player, stats["best"])
+
+    # Fold new game rows (prepared df rows, any order) into the rankings
+    def add_games(self, df):
+        df = df[df['Skóre 10. kolo'].notna() & df['Den'].notna()]
+        scores = df['Skóre 10. kolo'].groupby(df['Hráč'])
+        for player, total, games, best in zip(scores.sum().index, scores.sum(), scores.count(), scores.max()):
+            self._add_totals(player, int(total), int(games), int(best))
+        return self._add_last_day(df)
+
+    # Rankings from aggregates that are already known, e.g. the history store's player summary,
+    # plus the rows of the last game day
+    @classmethod
+    def from_summary(cls, player_summary, last_rows):
+        board = cls()
+        for player, total, games, best in zip(player_summary.index, player_summary['total'], player_summary['games'],
+                                              player_summary['best']):
+            board._add_totals(player, int(total), int(games), None if pd.isna(best) else int(best))
+        return board._add_last_day(last_rows[last_rows['Skóre 10. kolo'].notna() & last_rows['Den'].notna()])
+
+    def _add_last_day(self, df):
+        if not len(df):
+            return self
+        # A later game day replaces the last-day ranking, more games of the same day extend it
+        day = df['Den'].max()
+        if self.last_day is None or day > self.last_day:
+            for player in list(self.last):
+                self._set("last", player, None)
+            self.last_day, self.last = day, {}
+        if day == self.last_day:
+            last_rows = df[df['Den'] == day]
+            last_scores = last_rows['Skóre 10. kolo'].groupby(last_rows['Hráč'])
+            for player, total, games in zip(last_scores.sum().index, last_scores.sum(), last_scores.count()):
+                totals = self.last.setdefault(player, [0, 0])
+                totals[0] += int(total)
+                totals[1] += int(games)
+                self._set("last", player, totals[0] / totals[1])
+        return self
+
+    # Rank of a player, 1 for the best; tied players share the better rank
+    def rank(self, name, player):
+        key = self._keys[name].get(player)
+        if key is None:
+            return None
+        return self.trees[name].rank((key[0], "")) + 1
+
+    def top(self, name, k=TOP_K):
+        return [(self.rank(name, player), player, -value) for value, player in self.trees[name].smallest(k)]
+
+    # Plain data for the UI, precomputed with every data version
+    def snapshot(self, k=TOP_K):
+        snapshot = {}
+        for name, title in RANKINGS.items():
+            if name == "last" and self.last_day is not None:
+                title = f"{title} ({pd.Timestamp(self.last_day).strftime('%d/%m/%Y')})"
+            rows = [{"rank": rank, "player": player, "value": round(value, 1) if isinstance(value, float) else value}
+                    for rank, player, value in self.top(name, k)]
+            snapshot[name] = {"title": title, "rows": rows}
+        return snapshot
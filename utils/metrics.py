@@ -0,0 +1,184 @@
+# utils/metrics.py
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a cached callback up to a cold Sheets download
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, series in self._series.items():
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    samples.append((self.name + "_bucket", key + (("le", repr(bound)),), count))
+                samples.append((self.name + "_bucket", key + (("le", "+Inf"),), series["count"]))
+                samples.append((self.name + "_sum", key, series["sum"]))
+                samples.append((self.name + "_count", key, series["count"]))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    # `collect` returns (name, kind, help, [(labels dict, value), ...]) tuples, read at scrape time
+    def register_collector(self, collect):
+        self._collectors.append(collect)
+
+    # Everything in the Prometheus text exposition format
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        for collect in self._collectors:
+            for name, kind, help, values in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in values:
+                    lines.append(f"{name}{_format_labels(_label_key(labels))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+@contextmanager
+def timer(name, help="", **labels):
+    histogram = REGISTRY.histogram(name, help)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+# Opt-in profiling of a single call: once armed, the next instrumented call runs under
+# cProfile and its report is written to `directory`
+class Profiler:
+    def __init__(self, directory):
+        self.directory = directory
+        self.last_report = None
+        self._armed = False
+        self._lock = threading.Lock()
+
+    def arm(self):
+        with self._lock:
+            self._armed = True
+
+    def _take(self):
+        with self._lock:
+            armed, self._armed = self._armed, False
+            return armed
+
+    def run(self, label, func, *args, **kwargs):
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            # .prof loads in snakeviz / flameprof, the text report is readable as is
+            profile.dump_stats(os.path.join(self.directory, f"{label}-{stamp}.prof"))
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(40)
+            self.last_report = out.getvalue()
+            with open(os.path.join(self.directory, f"{label}-{stamp}.txt"), 'w', encoding='utf-8') as f:
+                f.write(self.last_report)
+
+
+PROFILER = Profiler(os.environ.get("BOWLING_PROFILE_DIR", "profiles"))
+
+
+# Decorator timing every call into the `name` histogram, and profiling it when armed
+def instrument(name, help="", **labels):
+    def decorator(func):
+        label = labels.get("callback") or labels.get("figure") or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, help, **labels):
+                if PROFILER._take():
+                    return PROFILER.run(label, func, *args, **kwargs)
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
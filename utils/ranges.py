@@ -0,0 +1,320 @@
+# utils/ranges.py
+import numpy as np
+import pandas as pd
+
+from . import frames
+
+# Statistics of any range of game days without filtering the games again. Windows from the day
+# slider always cover whole game days, so the games are summed per player and game day
+# ("entries", in the order of the prepared df: by player, then day) and every player owns a
+# block of entries. Prefix sums over the entries give the sums of a window as two lookups, and
+# the entries of a window are found by a binary search of the player's block. The tables are
+# NumPy arrays listed in RangeStats.ARRAYS, which utils.shared_data publishes memory-mapped.
+
+# Summed per game: score, its square (for the variance), strikes, spares and played games
+FIELDS = ("score", "score_sq", "strikes", "spares", "games")
+
+# Sentinels for entries without a played game in the min/max tables, scores are far inside int16
+_NO_MIN = np.iinfo(np.int16).max
+_NO_MAX = np.iinfo(np.int16).min
+
+
+# Sparse table for range minimum or maximum: row k holds the result of the run of 2**k values
+# starting at every index. Any range [lo, hi) is covered by two overlapping runs, so a query is
+# O(1). With `stops`, the end of the group of every value, runs are cut at the end of their
+# group: the columns of a group then do not depend on its neighbours and can be copied as they
+# are when only other groups change.
+def sparse_table(values, reduce, max_length=None, stops=None):
+    values = np.asarray(values)
+    n = len(values)
+    max_length = n if max_length is None else max_length
+    table = np.empty((max(max_length, 1).bit_length(), n), dtype=values.dtype)
+    table[0] = values
+    width = 1
+    for k in range(1, len(table)):
+        table[k] = table[k - 1]
+        m = max(n - width, 0)
+        runs = reduce(table[k - 1, :m], table[k - 1, width:])
+        table[k, :m] = runs if stops is None else np.where(np.arange(width, n) < stops[:m], runs, table[k - 1, :m])
+        width *= 2
+    return table
+
+
+def sparse_query(table, reduce, lo, hi):
+    k = (hi - lo).bit_length() - 1
+    return reduce(table[k, lo], table[k, hi - (1 << k)])
+
+
+# Row i is the sum of the rows [0, i) of `counts`
+def _prefix_rows(counts, dtype=np.int32):
+    prefix = np.zeros((len(counts) + 1, counts.shape[1]), dtype=dtype)
+    np.cumsum(counts, axis=0, out=prefix[1:])
+    return prefix
+
+
+# `reduce` of the runs of rows starting at `starts`, which cover all rows
+def _reduce_runs(reduce, values, starts):
+    return reduce.reduceat(values, starts, axis=0) if len(starts) else values[:0]
+
+
+# Rows [lo, hi) of a player's games in the prepared df inside the window of positions, by a
+# binary search of `positions` (df's absolute_game_position) in the player's (start, stop) block
+def player_rows(positions, block, window=None):
+    start, stop = block
+    if window is None:
+        return start, stop
+    return (start + int(np.searchsorted(positions[start:stop], window[0], side='left')),
+            start + int(np.searchsorted(positions[start:stop], window[1], side='right')))
+
+
+# Row indices of every game inside the window, in the order of `positions`
+def window_rows(positions, window=None):
+    positions = np.asarray(positions)
+    if window is None:
+        return np.arange(len(positions))
+    return np.flatnonzero((positions >= window[0]) & (positions <= window[1]))
+
+
+# Sums, average and variance of a window, with its best and worst game
+def summary_stats(sums, best, worst):
+    games = sums["games"]
+    average = sums["score"] / games if games else np.nan
+    variance = sums["score_sq"] / games - average * average if games else np.nan
+    return {
+        **sums,
+        "average": average,
+        "variance": max(variance, 0.0) if games else np.nan,
+        "best": best,
+        "worst": worst,
+    }
+
+
+# Game days and the positions of their first and last games, for the date slider. Subclasses
+# give the statistics of every player, in df order, through _all_player_stats.
+class GameDays:
+    # Positions (first, last) of the game days first_day..last_day, as indices into `days`
+    def window(self, first_day, last_day):
+        last_index = len(self.days) - 1
+        first_day = min(max(int(first_day), 0), last_index)
+        last_day = min(max(int(last_day), first_day), last_index)
+        return int(self.day_first[first_day]), int(self.day_last[last_day])
+
+    # Indices [first, stop) into `days` of the game days inside the window of positions
+    def day_span(self, window=None):
+        if window is None:
+            return 0, len(self.days)
+        return (int(np.searchsorted(self.day_last, window[0], side='left')),
+                int(np.searchsorted(self.day_first, window[1], side='right')))
+
+    # True when the window covers every game day
+    def is_full(self, window):
+        return window is None or (window[0] <= self.day_first[0] and window[1] >= self.day_last[-1])
+
+    # Team totals inside the window and the players with the best and worst game; ties go to the
+    # first player in df order, like data_prep.build_team_summary
+    def team_stats(self, window=None):
+        totals = dict.fromkeys(FIELDS, 0)
+        top_player = top_score = worst_player = worst_score = None
+        for player, stats in self._all_player_stats(window):
+            for field in FIELDS:
+                totals[field] += stats[field]
+            if stats["games"]:
+                if top_score is None or stats["best"] > top_score:
+                    top_player, top_score = player, stats["best"]
+                if worst_score is None or stats["worst"] < worst_score:
+                    worst_player, worst_score = player, stats["worst"]
+        return {
+            **summary_stats(totals, top_score, worst_score),
+            "top_player": top_player,
+            "top_score": top_score,
+            "worst_player": worst_player,
+            "worst_score": worst_score,
+        }
+
+    # Marks for a slider over the game days, at most `count` of them
+    def day_marks(self, count=8):
+        if not len(self.days):
+            return {}
+        indices = np.unique(np.linspace(0, len(self.days) - 1, min(count, len(self.days))).round().astype(int))
+        return {int(i): self.days[i].strftime('%d/%m/%Y') for i in indices}
+
+
+class RangeStats(GameDays):
+    # Tables published as memory-mapped .npy files by utils.shared_data
+    ARRAYS = ("day_first", "day_last", "entry_days", "prefix", "min_scores", "max_scores", "result_prefix",
+              "team_result_prefix")
+
+    # `games` has the columns 'Hráč', 'Den', 'absolute_game_position', 'Skóre 10. kolo',
+    # 'Num Strikes' and 'Num Spares', sorted by player and position; `frame_matrix` is row-aligned.
+    # Games without a date have no position and are left out.
+    def __init__(self, games, frame_matrix):
+        dated = games['Den'].notna().to_numpy()
+        if not dated.all():
+            games, frame_matrix = games[dated], frame_matrix[dated]
+        by_day = games.groupby('Den')['absolute_game_position']
+        self.days = by_day.min().index
+        self.day_first = by_day.min().to_numpy(dtype=np.int64)
+        self.day_last = by_day.max().to_numpy(dtype=np.int64)
+
+        # An entry starts wherever the player or the game day changes
+        codes, players = pd.factorize(games['Hráč'])
+        day_index = self.days.get_indexer(games['Den'])
+        entry_starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (day_index[1:] != day_index[:-1])]
+                                      if len(codes) else np.array([], dtype=bool))
+        self.entry_days = day_index[entry_starts].astype(np.int32)
+        entry_codes = codes[entry_starts]
+        block_starts = np.flatnonzero(np.r_[True, entry_codes[1:] != entry_codes[:-1]] if len(entry_codes) else [])
+        block_stops = np.r_[block_starts[1:], len(entry_codes)].astype(int)
+        self.blocks = {players[entry_codes[start]]: (int(start), int(stop)) for start, stop in zip(block_starts, block_stops)}
+
+        scores = games['Skóre 10. kolo'].to_numpy(dtype=float)
+        played = ~np.isnan(scores)
+        scores = np.where(played, scores, 0).astype(np.int64)
+        values = np.column_stack([
+            scores,
+            scores * scores,
+            games['Num Strikes'].fillna(0).to_numpy(dtype=np.int64),
+            games['Num Spares'].fillna(0).to_numpy(dtype=np.int64),
+            played.astype(np.int64),
+        ])
+        # Row i of the prefix sums is the sum of the entries [0, i), one column per field
+        self.prefix = _prefix_rows(_reduce_runs(np.add, values, entry_starts), np.int64)
+
+        # Best and worst game of every entry. Runs are cut at the end of each player's block, so
+        # the tables only need levels up to the longest block.
+        best = _reduce_runs(np.maximum, np.where(played, scores, _NO_MAX), entry_starts).astype(np.int16)
+        worst = _reduce_runs(np.minimum, np.where(played, scores, _NO_MIN), entry_starts).astype(np.int16)
+        longest = int((block_stops - block_starts).max()) if len(block_starts) else 0
+        stops = np.repeat(block_stops, block_stops - block_starts)
+        self.min_scores = sparse_table(worst, np.minimum, longest, stops)
+        self.max_scores = sparse_table(best, np.maximum, longest, stops)
+
+        # Cumulative result counts, (entries + 1) x results per player and (days + 1) x results for
+        # the team, so the counts of any window are the difference of two rows
+        entry_counts = _reduce_runs(np.add, frames.row_result_counts(frame_matrix), entry_starts)
+        self.result_prefix = _prefix_rows(entry_counts)
+        day_counts = np.zeros((len(self.days), entry_counts.shape[1]), dtype=entry_counts.dtype)
+        np.add.at(day_counts, self.entry_days, entry_counts)
+        self.team_result_prefix = _prefix_rows(day_counts)
+
+    # Statistics with `games` appended, e.g. a new game night. They are sorted like the games of
+    # the constructor, lie on the last game day or later ones and come after each player's
+    # previous games. Only the new games are summed; the entries are merged into each player's
+    # block and the sparse tables are rebuilt for the blocks that changed. Returns a new
+    # RangeStats, this one may still be served.
+    def extend(self, games, frame_matrix):
+        new = RangeStats(games, frame_matrix)
+        merged = RangeStats.__new__(RangeStats)
+
+        # The first new day may be the last day so far
+        overlap = int(len(new.days) > 0 and len(self.days) > 0 and new.days[0] == self.days[-1])
+        day_shift = len(self.days) - overlap
+        merged.days = self.days.append(new.days[overlap:])
+        merged.day_first = np.concatenate([self.day_first, new.day_first[overlap:]])
+        merged.day_last = np.concatenate([self.day_last, new.day_last[overlap:]])
+        if overlap:
+            merged.day_first[day_shift] = min(self.day_first[-1], new.day_first[0])
+            merged.day_last[day_shift] = max(self.day_last[-1], new.day_last[0])
+        new_days = new.entry_days + day_shift
+
+        # Entries of both, old ones first: sums, result counts, best and worst game and day
+        new_sums, new_counts = np.diff(new.prefix, axis=0), np.diff(new.result_prefix, axis=0)
+        sums = np.concatenate([np.diff(self.prefix, axis=0), new_sums])
+        counts = np.concatenate([np.diff(self.result_prefix, axis=0), new_counts])
+        best = np.concatenate([self.max_scores[0], new.max_scores[0]])
+        worst = np.concatenate([self.min_scores[0], new.min_scores[0]])
+        days = np.concatenate([self.entry_days, new_days]).astype(np.int32)
+
+        # A player's block is their old entries followed by their new ones; a new entry on the
+        # day of their last old entry is added into it
+        old_count = len(self.entry_days)
+        pieces, joined, changed = [], [], set()
+        blocks = {}
+        offset = 0
+        for player in sorted(self.blocks.keys() | new.blocks.keys()):
+            start, stop = self.blocks.get(player, (0, 0))
+            new_start, new_stop = new.blocks.get(player, (0, 0))
+            if new_stop > new_start:
+                changed.add(player)
+                if stop > start and self.entry_days[stop - 1] == new_days[new_start]:
+                    joined.append((offset + stop - start - 1, new_start))
+                    new_start += 1
+            pieces += [np.arange(start, stop), np.arange(old_count + new_start, old_count + new_stop)]
+            blocks[player] = (offset, offset + (stop - start) + (new_stop - new_start))
+            offset = blocks[player][1]
+        order = np.concatenate(pieces) if pieces else np.array([], dtype=np.intp)
+
+        sums, counts, best, worst = sums[order], counts[order], best[order], worst[order]
+        merged.entry_days = days[order]
+        merged.blocks = blocks
+        for entry, source in joined:
+            sums[entry] += new_sums[source]
+            counts[entry] += new_counts[source]
+            best[entry] = max(best[entry], new.max_scores[0, source])
+            worst[entry] = min(worst[entry], new.min_scores[0, source])
+        merged.prefix = _prefix_rows(sums, np.int64)
+
+        # Unchanged blocks keep their columns of the sparse tables, only moved
+        longest = max((stop - start for start, stop in merged.blocks.values()), default=0)
+        merged.min_scores = np.empty((max(longest, 1).bit_length(), len(worst)), dtype=worst.dtype)
+        merged.max_scores = np.empty_like(merged.min_scores)
+        same_levels = len(merged.min_scores) == len(self.min_scores)
+        for player, (start, stop) in merged.blocks.items():
+            if same_levels and player not in changed:
+                old_start, old_stop = self.blocks[player]
+                merged.min_scores[:, start:stop] = self.min_scores[:, old_start:old_stop]
+                merged.max_scores[:, start:stop] = self.max_scores[:, old_start:old_stop]
+            else:
+                merged.min_scores[:, start:stop] = sparse_table(worst[start:stop], np.minimum, longest)
+                merged.max_scores[:, start:stop] = sparse_table(best[start:stop], np.maximum, longest)
+
+        merged.result_prefix = _prefix_rows(counts, self.result_prefix.dtype)
+        # The team counts of the overlapping day add up, later days are appended
+        day_counts = np.diff(self.team_result_prefix, axis=0)
+        new_day_counts = np.diff(new.team_result_prefix, axis=0)
+        if overlap:
+            day_counts = day_counts.copy()
+            day_counts[-1] += new_day_counts[0]
+        merged.team_result_prefix = _prefix_rows(np.concatenate([day_counts, new_day_counts[overlap:]]),
+                                                 self.team_result_prefix.dtype)
+        return merged
+
+    # Entries [lo, hi) of a player inside the window
+    def entries(self, player, window=None):
+        start, stop = self.blocks.get(player, (0, 0))
+        if window is None:
+            return start, stop
+        first, last = self.day_span(window)
+        days = self.entry_days[start:stop]
+        return start + int(np.searchsorted(days, first, side='left')), start + int(np.searchsorted(days, last, side='left'))
+
+    # Sums, average, variance, best and worst game of a player inside the window
+    def player_stats(self, player, window=None):
+        lo, hi = self.entries(player, window)
+        sums = {field: int(value) for field, value in zip(FIELDS, self.prefix[hi] - self.prefix[lo])}
+        if not sums["games"]:
+            return summary_stats(sums, None, None)
+        return summary_stats(sums, int(sparse_query(self.max_scores, np.maximum, lo, hi)),
+                             int(sparse_query(self.min_scores, np.minimum, lo, hi)))
+
+    def _all_player_stats(self, window):
+        return ((player, self.player_stats(player, window)) for player in self.blocks)
+
+    # Number of frames with each result inside the window, for one player or the whole team
+    def result_counts(self, player=None, window=None):
+        if player is not None:
+            lo, hi = self.entries(player, window)
+            counts = self.result_prefix[hi] - self.result_prefix[lo]
+        else:
+            first, last = self.day_span(window)
+            counts = self.team_result_prefix[last] - self.team_result_prefix[first]
+        return pd.Series(counts.astype(np.int64), index=frames.FRAME_LABELS)
+
+    # Result counts of everything up to the end of every game day, (days x results), for stepping
+    # through the history
+    def cumulative_result_counts(self, player=None):
+        if player is None:
+            return self.team_result_prefix[1:]
+        start, stop = self.blocks.get(player, (0, 0))
+        ends = start + np.searchsorted(self.entry_days[start:stop], np.arange(len(self.days)), side='right')
+        return self.result_prefix[ends] - self.result_prefix[start]
@@ -0,0 +1,132 @@
+# utils/refresh.py
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from . import metrics
+
+# Until the first load succeeds it is retried this often instead of once per interval
+FIRST_LOAD_RETRY_SECONDS = 10.0
+
+# Refreshes asked for with trigger() (POST /refresh) are honored at most this often; each one
+# reads the sheet's modified time and may download it again
+MIN_TRIGGER_SECONDS = float(os.environ.get("BOWLING_REFRESH_MIN_SECONDS", 60))
+
+
+# One fully prepared dataset. Callbacks grab a reference once and read everything from it,
+# so a refresh swapping in a new version never shows them a half-built state.
+@dataclass(frozen=True)
+class PreparedData:
+    version: int
+    loaded_at: float
+    data: MappingProxyType = field(repr=False)
+    raw: object = field(default=None, repr=False, compare=False)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+
+# Default prepare step. `previous` is the PreparedData being replaced; rows appended since
+# are folded into it incrementally instead of preparing the whole sheet again.
+def prepare(raw_df, previous=None):
+    # Imported here so the app can create its refresher before pandas and plotly are loaded
+    from . import data_prep
+
+    if previous is not None and previous.raw is not None:
+        return data_prep.update_data(previous.data, previous.raw, raw_df.copy())
+    return data_prep.prepare_data(raw_df.copy())
+
+
+# Re-fetches and re-prepares the data in a background thread on an interval or on demand.
+# `load` is a zero-argument callable returning the raw sheet DataFrame, `on_refresh` is
+# called with every newly published PreparedData (e.g. to drop cached figures).
+# `prepare(raw_df, previous)` turns the raw frame into the data_dict, or returns None when
+# nothing changed; with keep_raw=False the raw frame is not kept between refreshes.
+class DataRefresher:
+    def __init__(self, load, interval=None, on_refresh=None, prepare=prepare, keep_raw=True,
+                 min_trigger_interval=MIN_TRIGGER_SECONDS):
+        self._load = load
+        self._prepare = prepare
+        self.keep_raw = keep_raw
+        self.interval = interval
+        self.on_refresh = on_refresh
+        self.min_trigger_interval = min_trigger_interval
+        self._refreshed_at = None
+        self._current = None
+        self._version = 0
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    @property
+    def current(self):
+        # Plain attribute read, the swap in refresh() is a single reference assignment
+        return self._current
+
+    def refresh(self):
+        with self._refresh_lock:
+            self._refreshed_at = time.monotonic()
+            raw_df = self._load()
+            current = self._current
+            if current is not None and current.raw is not None and current.raw.equals(raw_df):
+                return current
+            with metrics.timer("bowling_prepare_data_seconds", "Time spent in prepare_data"):
+                data_dict = self._prepare(raw_df, current)
+            if data_dict is None:
+                return current
+            self._version += 1
+            self._current = PreparedData(version=self._version, loaded_at=time.time(), data=MappingProxyType(data_dict),
+                                         raw=raw_df if self.keep_raw else None)
+            if self.on_refresh is not None:
+                self.on_refresh(self._current)
+            return self._current
+
+    # Ask the background thread to refresh now instead of waiting for the interval. Returns
+    # False and does nothing while a refresh is pending or within min_trigger_interval of the
+    # last one.
+    def trigger(self):
+        refreshed_at = self._refreshed_at
+        if self._wake.is_set() or (refreshed_at is not None and time.monotonic() - refreshed_at < self.min_trigger_interval):
+            return False
+        self._wake.set()
+        return True
+
+    def start(self):
+        if self._thread is not None:
+            return
+        # Nothing loaded yet: the first load runs in the thread right away, not after `interval`
+        if self._current is None:
+            self._wake.set()
+        self._thread = threading.Thread(target=self._run, name="data-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            timeout = self.interval
+            if self._current is None and self.last_error is not None:
+                timeout = FIRST_LOAD_RETRY_SECONDS
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as exc:
+                # Keep serving the previous version, try again next round
+                self.last_error = exc
+                metrics.REGISTRY.counter("bowling_refresh_errors_total", "Failed background refreshes").inc()
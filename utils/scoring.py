@@ -0,0 +1,62 @@
+# utils/scoring.py
+import numpy as np
+
+from . import frames
+
+# The sheet keeps one result per frame (pins, Spare or Strike), not the single balls: the first
+# ball of a spare or an open frame and the bonus balls of the 10th frame are unknown. Every running
+# score is therefore a range, from the lowest to the highest score the frame results allow.
+# A score only grows with every ball, so taking all unknown balls at their minimum (maximum) at
+# once gives a lower (upper) bound that an actual game reaches.
+
+
+# Per-frame ranges of the unknown balls, every array is (games x frames) int16
+def _ball_ranges(matrix):
+    codes = matrix.astype(np.int16)
+    strike = codes == frames.STRIKE
+    spare = codes == frames.SPARE
+    missing = codes == frames.MISSING
+    pins = np.where(strike | spare | missing, 0, codes)
+    pins = np.where(strike | spare, 10, pins)
+
+    # First ball of the frame
+    first_low = np.where(strike, 10, 0).astype(np.int16)
+    first_high = np.where(strike | missing, 10, np.where(spare, 9, pins)).astype(np.int16)
+
+    # The first two balls from this frame on; after a strike the second one is the next frame's first
+    two_low = pins.copy()
+    two_high = np.where(missing, 20, pins).astype(np.int16)
+    two_low[:, :-1] = np.where(strike[:, :-1], 10 + first_low[:, 1:], two_low[:, :-1])
+    two_high[:, :-1] = np.where(strike[:, :-1], 10 + first_high[:, 1:], two_high[:, :-1])
+    # In the 10th frame the ball after a strike is its first bonus ball
+    two_high[:, -1] = np.where(strike[:, -1], 20, two_high[:, -1])
+
+    return strike, spare, missing, pins, first_low, first_high, two_low, two_high
+
+
+# Lower and upper bound of the score of every frame, bonuses included
+def frame_scores(matrix):
+    strike, spare, missing, pins, first_low, first_high, two_low, two_high = _ball_ranges(matrix)
+
+    low = pins.copy()
+    high = np.where(missing, 10, pins).astype(np.int16)
+    # Frames 1-9 take the next ball after a spare and the next two balls after a strike
+    low[:, :-1] += np.where(strike[:, :-1], two_low[:, 1:], np.where(spare[:, :-1], first_low[:, 1:], 0))
+    high[:, :-1] += np.where(strike[:, :-1] | missing[:, :-1], two_high[:, 1:], np.where(spare[:, :-1], first_high[:, 1:], 0))
+
+    # The 10th frame counts its bonus balls itself: up to two after a strike, one after a spare
+    high[:, -1] += np.where(strike[:, -1] | missing[:, -1], 20, np.where(spare[:, -1], 10, 0))
+    return low, high
+
+
+# Running score after every frame, as (lower, upper) bound matrices. Both are equal where the
+# frame results pin the score down, e.g. for a game of open frames only.
+def running_scores(matrix):
+    low, high = frame_scores(matrix)
+    return np.cumsum(low, axis=1, dtype=np.int16), np.cumsum(high, axis=1, dtype=np.int16)
+
+
+# Rows whose total in the sheet is outside the range their frames allow
+def total_mismatches(running_low, running_high, totals):
+    totals = np.asarray(totals, dtype=float)
+    return (totals < running_low[:, -1]) | (totals > running_high[:, -1])
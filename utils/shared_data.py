@@ -0,0 +1,238 @@
+# utils/shared_data.py
+#
+# Prepared data shared between the workers of a multi-worker server. One leader process
+# loads and prepares the data and publishes it to a directory; every worker maps the
+# published files read-only instead of fetching the sheet and holding its own copy.
+#
+#   <directory>/CURRENT               name of the live version
+#   <directory>/<version>/df.arrow    prepared df, Arrow IPC file (memory-mapped)
+#   <directory>/<version>/<array>.npy frame_matrix and the running score bounds (memory-mapped)
+#   <directory>/<version>/<key>.<attribute>.npy
+#                                     tables of the objects in data_dict that list them in an
+#                                     ARRAYS class attribute, e.g. ranges.RangeStats (memory-mapped)
+#   <directory>/<version>/meta.pkl    everything else in data_dict (small)
+#   <directory>/REFRESH               present when a worker asked for a refresh
+import argparse
+import copy
+import os
+import pickle
+import shutil
+import signal
+import sys
+import threading
+import time
+from types import MappingProxyType
+
+import numpy as np
+import pyarrow as pa
+
+from . import metrics
+from . import refresh
+from . import sheets
+
+CURRENT = "CURRENT"
+# Row-aligned NumPy arrays of data_dict, stored as .npy files
+ARRAYS = ("frame_matrix", "score_low", "score_high")
+REFRESH_REQUEST = "REFRESH"
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def publish(prepared, directory, keep=2):
+    os.makedirs(directory, exist_ok=True)
+    # Version numbers restart with the leader, the leading timestamp keeps names unique and ordered
+    name = f"{int(prepared.loaded_at * 1000):015d}-v{prepared.version}"
+    tmp_dir = os.path.join(directory, name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    data = dict(prepared.data)
+    df = data.pop("df")
+    arrays = {name: data.pop(name) for name in ARRAYS}
+
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    with pa.OSFile(os.path.join(tmp_dir, "df.arrow"), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    for array_name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{array_name}.npy"), array)
+    # The tables leave the pickled object; the leader's own object is left as it is
+    for key, value in data.items():
+        if hasattr(type(value), "ARRAYS"):
+            data[key] = copy.copy(value)
+            for attribute in value.ARRAYS:
+                np.save(os.path.join(tmp_dir, f"{key}.{attribute}.npy"), getattr(value, attribute))
+                setattr(data[key], attribute, None)
+    with open(os.path.join(tmp_dir, "meta.pkl"), 'wb') as f:
+        pickle.dump({"version": prepared.version, "loaded_at": prepared.loaded_at, "data": data}, f)
+
+    os.replace(tmp_dir, os.path.join(directory, name))
+    _write_atomic(os.path.join(directory, CURRENT), name)
+
+    # Workers may still map older versions; unlinked files stay valid until they are unmapped
+    versions = sorted(entry for entry in os.listdir(directory)
+                      if entry[:1].isdigit() and not entry.endswith(".tmp"))
+    for old in versions[:-keep]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return name
+
+
+def current_name(directory):
+    try:
+        with open(os.path.join(directory, CURRENT), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+# Map a published version. Numeric columns of df and the arrays point straight
+# into the page cache, so every worker shares one physical copy of them.
+def load_published(directory, name=None):
+    name = name or current_name(directory)
+    if name is None:
+        return None
+    path = os.path.join(directory, name)
+
+    with open(os.path.join(path, "meta.pkl"), 'rb') as f:
+        meta = pickle.load(f)
+    table = pa.ipc.open_file(pa.memory_map(os.path.join(path, "df.arrow"), 'r')).read_all()
+    data = meta["data"]
+    data["df"] = table.to_pandas(split_blocks=True)
+    for array_name in ARRAYS:
+        data[array_name] = np.load(os.path.join(path, f"{array_name}.npy"), mmap_mode='r')
+    for key, value in data.items():
+        for attribute in getattr(type(value), "ARRAYS", ()):
+            setattr(value, attribute, np.load(os.path.join(path, f"{key}.{attribute}.npy"), mmap_mode='r'))
+    return refresh.PreparedData(version=meta["version"], loaded_at=meta["loaded_at"], data=MappingProxyType(data))
+
+
+# Worker side: same interface as refresh.DataRefresher, but it only follows what the
+# leader publishes. CURRENT is checked at most every `check_interval` seconds.
+class SharedDataReader:
+    def __init__(self, directory, check_interval=1.0, on_refresh=None):
+        self.directory = directory
+        self.check_interval = check_interval
+        self.on_refresh = on_refresh
+        self._name = None
+        self._current = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+        return self._current
+
+    def refresh(self):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            name = current_name(self.directory)
+            if name is not None and name != self._name:
+                self._current = load_published(self.directory, name)
+                self._name = name
+                if self.on_refresh is not None:
+                    self.on_refresh(self._current)
+            return self._current
+
+    # Ask the leader to refresh now. Returns False when a request is already pending; the leader
+    # honors requests at most every min_trigger_interval seconds.
+    def trigger(self):
+        path = os.path.join(self.directory, REFRESH_REQUEST)
+        if os.path.exists(path):
+            return False
+        _write_atomic(path, str(time.time()))
+        return True
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+# Leader side: refreshes on an interval or when a worker asked for it and publishes
+# every new version
+class Publisher:
+    def __init__(self, load, directory, interval=600.0, poll=2.0, min_trigger_interval=refresh.MIN_TRIGGER_SECONDS):
+        self.directory = directory
+        self.interval = interval
+        self.poll = poll
+        self.min_trigger_interval = min_trigger_interval
+        self.refresher = refresh.DataRefresher(load, on_refresh=lambda data: publish(data, directory))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def publish_once(self):
+        return self.refresher.refresh()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, name="data-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # Refresh and publish until stop() is called
+    def run(self):
+        request_path = os.path.join(self.directory, REFRESH_REQUEST)
+        # The first publish happens right away, workers serve the loading page until it is done
+        last_refresh = None
+        while last_refresh is None or not self._stop.wait(self.poll):
+            # A request right after the last refresh stays pending until min_trigger_interval has passed
+            requested = os.path.exists(request_path) and (
+                last_refresh is None or time.monotonic() - last_refresh >= self.min_trigger_interval)
+            due = self.interval if self.refresher.current is not None else refresh.FIRST_LOAD_RETRY_SECONDS
+            if not requested and last_refresh is not None and time.monotonic() - last_refresh < due:
+                continue
+            if requested:
+                try:
+                    os.remove(request_path)
+                except OSError:
+                    pass
+            last_refresh = time.monotonic()
+            try:
+                self.refresher.refresh()
+            except Exception:
+                # Workers keep serving the last published version
+                metrics.REGISTRY.counter("bowling_refresh_errors_total", "Failed background refreshes").inc()
+
+
+# Leader as a process of its own, `python -m utils.shared_data --directory DIR`. gunicorn.conf.py
+# starts it from the server master, which then neither imports pandas or pyarrow nor forks its
+# workers while a publisher thread holds their locks. It stops on SIGTERM or once its parent is gone.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load, prepare and publish the data for the server workers")
+    parser.add_argument("--directory", required=True, help="directory the workers map the data from")
+    parser.add_argument("--interval", type=float, default=600.0, help="seconds between refreshes")
+    args = parser.parse_args(argv)
+
+    publisher = Publisher(sheets.load_raw_data, args.directory, interval=args.interval)
+    signal.signal(signal.SIGTERM, lambda signum, frame: publisher._stop.set())
+    # Ctrl-C reaches the whole process group; the master stops the leader itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    parent = os.getppid()
+
+    def watch_parent():
+        while not publisher._stop.wait(publisher.poll):
+            if os.getppid() != parent:
+                publisher._stop.set()
+
+    threading.Thread(target=watch_parent, name="parent-watch", daemon=True).start()
+    publisher.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# utils/sheets.py
+import os
+import threading
+
+from . import metrics
+from . import snapshot
+from . import sources
+
+# Define the scope for Google Sheets API
+SCOPE = ["https://spreadsheets.google.com/feeds",
+         "https://www.googleapis.com/auth/spreadsheets",
+         "https://www.googleapis.com/auth/drive.file",
+         "https://www.googleapis.com/auth/drive"]
+
+# local: GOOGLE_SHEETS_KEY=GOOGLE_SHEETS_KEY.JSON, non local: the secret file of the host
+CREDENTIALS_PATH = os.environ.get("GOOGLE_SHEETS_KEY", "/etc/secrets/GOOGLE_SHEETS_KEY.JSON")
+
+SPREADSHEET_NAME = "Bowling-liga"
+
+_client = None
+_client_lock = threading.Lock()
+
+
+# Authenticate Google Sheets client on first use
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            import gspread
+            from oauth2client.service_account import ServiceAccountCredentials
+
+            credentials = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_PATH, SCOPE)
+            _client = gspread.authorize(credentials)
+        return _client
+
+
+# Load data from Google Sheets, or from the local snapshot if the sheet has not changed.
+# With BOWLING_SHEETS set, every configured sheet is loaded concurrently into one frame.
+@metrics.instrument("bowling_sheet_load_seconds", "Time to load the sheet or its local snapshot")
+def load_raw_data():
+    configured = sources.configured_sources()
+    try:
+        client = get_client()
+    except Exception:
+        # No credentials or no network, the last snapshot is better than nothing
+        if configured:
+            return sources.load_snapshots(configured)
+        if snapshot.has_snapshot():
+            return snapshot.read_snapshot()
+        raise
+    if configured:
+        return sources.load_sources(client, configured)
+    return snapshot.load_sheet(client, SPREADSHEET_NAME)
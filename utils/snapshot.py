@@ -0,0 +1,97 @@
+# utils/snapshot.py
+import json
+import os
+
+import pandas as pd
+
+# Where the last fetched sheet is kept between process starts
+SNAPSHOT_PATH = os.environ.get("BOWLING_SNAPSHOT_PATH", os.path.join("snapshot", "Bowling-liga.parquet"))
+
+NUMERIC_COLUMNS = ['Pořadové č. hry', 'Skóre 10. kolo']
+
+
+def _meta_path(path):
+    return path + ".meta.json"
+
+
+# Give the raw get_all_records() frame stable column types so it can be stored as Parquet
+def type_columns(df):
+    df = df.copy()
+    for col in df.columns:
+        if col in NUMERIC_COLUMNS:
+            values = pd.to_numeric(df[col], errors='coerce')
+            df[col] = values.astype('int64') if values.notna().all() else values
+        elif col == 'Den':
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        else:
+            # Frame columns mix 'Strike'/'Spare' with pin counts, keep them as text
+            df[col] = df[col].astype(str)
+    return df
+
+
+def read_snapshot_meta(path=SNAPSHOT_PATH):
+    try:
+        with open(_meta_path(path), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    return pd.read_parquet(path)
+
+
+def write_snapshot(df, modified_time, path=SNAPSHOT_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Write next to the target and rename so a crash never leaves a torn snapshot
+    tmp_path = path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+    tmp_meta = _meta_path(path) + ".tmp"
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump({"modified_time": modified_time, "rows": len(df)}, f)
+    os.replace(tmp_meta, _meta_path(path))
+
+
+def has_snapshot(path=SNAPSHOT_PATH):
+    return os.path.exists(path) and read_snapshot_meta(path) is not None
+
+
+# Load the sheet, downloading it only when its modified time differs from the snapshot.
+# `client` is anything with gspread's open(name) -> spreadsheet interface, so a local
+# stand-in can be passed instead of an authorized gspread client. `worksheet` picks a tab by
+# title instead of the first one, and every remote call goes through `call`, e.g. a retry.
+def load_sheet(client, spreadsheet_name="Bowling-liga", path=SNAPSHOT_PATH, worksheet=None, call=None):
+    call = call or (lambda func: func())
+    meta = read_snapshot_meta(path)
+    snapshot_ok = meta is not None and os.path.exists(path)
+
+    try:
+        spreadsheet = call(lambda: client.open(spreadsheet_name))
+        modified_time = call(spreadsheet.get_lastUpdateTime)
+    except Exception:
+        # Sheets unreachable, serve whatever we have locally
+        if snapshot_ok:
+            return read_snapshot(path)
+        raise
+
+    if snapshot_ok and meta.get("modified_time") == modified_time:
+        return read_snapshot(path)
+
+    try:
+        if worksheet is None:
+            data = call(lambda: spreadsheet.sheet1.get_all_records())
+        else:
+            data = call(lambda: spreadsheet.worksheet(worksheet).get_all_records())
+    except Exception:
+        if snapshot_ok:
+            return read_snapshot(path)
+        raise
+
+    df = type_columns(pd.DataFrame(data))
+    write_snapshot(df, modified_time, path)
+    return df
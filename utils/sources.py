@@ -0,0 +1,159 @@
+# utils/sources.py
+import json
+import os
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import pandas as pd
+
+from . import metrics
+from . import snapshot
+
+# Several spreadsheets or worksheets, e.g. past seasons next to the current one, loaded as one
+# sheet. BOWLING_SHEETS is a JSON list, inline or in a file:
+#
+#   [{"spreadsheet": "Bowling-liga 2023", "season": "2023"},
+#    {"spreadsheet": "Bowling-liga", "worksheet": "Jaro", "season": "2024"}]
+#
+# Rows come out in the order of the list, so keep the current season last: rows appended to it
+# then stay appended rows of the combined sheet and the refresh can fold them in incrementally.
+SOURCES_ENV = "BOWLING_SHEETS"
+MAX_WORKERS = int(os.environ.get("BOWLING_SHEET_WORKERS", 4))
+
+# Columns added to every row
+SEASON_COLUMN = 'season'
+SOURCE_COLUMN = 'source'
+
+# Rate limits and transient server errors of the Sheets API are retried with exponential backoff
+RETRY_STATUS = {429, 500, 502, 503, 504}
+RETRIES = 5
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 32.0
+# Total time one source may spend on its calls and their retries; no retry starts after it
+RETRY_DEADLINE_SECONDS = float(os.environ.get("BOWLING_SHEET_RETRY_SECONDS", 60))
+
+
+# Loading one configured sheet failed; the original error is the __cause__
+class SourceError(RuntimeError):
+    def __init__(self, source, error):
+        super().__init__(f"Loading {source.label} failed: {error!r}")
+        self.source = source
+
+
+@dataclass(frozen=True)
+class SheetSource:
+    spreadsheet: str
+    worksheet: str = None
+    season: str = None
+    source: str = None
+
+    # Tag of the rows, unless the configuration names it
+    @property
+    def label(self):
+        return self.source or (self.spreadsheet if self.worksheet is None else f"{self.spreadsheet}/{self.worksheet}")
+
+    # Own snapshot next to the main one, so an unchanged spreadsheet is not downloaded again
+    def snapshot_path(self, directory):
+        return os.path.join(directory, re.sub(r'[^\w.-]+', '_', self.label) + ".parquet")
+
+
+# Sources from BOWLING_SHEETS, or None when the single default sheet is used
+def configured_sources(value=None):
+    value = os.environ.get(SOURCES_ENV) if value is None else value
+    if not value:
+        return None
+    if os.path.exists(value):
+        with open(value, encoding='utf-8') as f:
+            entries = json.load(f)
+    else:
+        entries = json.loads(value)
+    sources = [SheetSource(**entry) for entry in entries]
+    labels = [source.label for source in sources]
+    if len(set(labels)) != len(labels):
+        raise ValueError(f"{SOURCES_ENV} lists a source twice: {labels}")
+    return sources
+
+
+# requests' connection errors and timeouts do not derive from the builtin ones; any request
+# that failed without a response (reset connection, broken chunked body) is retried as well
+def _retryable(error):
+    from requests import exceptions as requests_errors
+
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) in RETRY_STATUS:
+        return True
+    return (isinstance(error, (ConnectionError, TimeoutError, requests_errors.ConnectionError, requests_errors.Timeout))
+            or (isinstance(error, requests_errors.RequestException) and response is None))
+
+
+# Call `func`, retrying rate limits and transient errors after 1, 2, 4 ... seconds (with jitter,
+# so parallel downloads do not retry in lockstep). No retry is made that would end after
+# `deadline`, a time on `clock`.
+def retrying(func, retries=RETRIES, backoff=BACKOFF_SECONDS, max_backoff=MAX_BACKOFF_SECONDS, deadline=None,
+             sleep=time.sleep, clock=time.monotonic, label=""):
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as error:
+            if attempt >= retries or not _retryable(error):
+                raise
+            delay = min(max_backoff, backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+            if deadline is not None and clock() + delay > deadline:
+                raise
+            metrics.REGISTRY.counter("bowling_sheet_retries_total", "Retried Sheets API calls").inc(source=label)
+            sleep(delay)
+            attempt += 1
+
+
+def _tag(df, source):
+    return df.assign(**{SEASON_COLUMN: source.season or "", SOURCE_COLUMN: source.label})
+
+
+# All calls of one source share its retry deadline; a failure is raised as a SourceError
+def load_source(client, source, directory, sleep=time.sleep, clock=time.monotonic):
+    deadline = clock() + RETRY_DEADLINE_SECONDS
+
+    def call(func):
+        return retrying(func, deadline=deadline, sleep=sleep, clock=clock, label=source.label)
+
+    with metrics.timer("bowling_sheet_source_seconds", "Time to load one configured sheet", source=source.label):
+        try:
+            df = snapshot.load_sheet(client, source.spreadsheet, source.snapshot_path(directory), worksheet=source.worksheet,
+                                     call=call)
+        except Exception as error:
+            raise SourceError(source, error) from error
+    return _tag(df, source)
+
+
+# Load every source on a bounded thread pool. Each sheet is typed and tagged in its worker as
+# soon as it arrives; the frames are combined once all are in, in the order of `sources`, so the
+# result does not depend on which download finished first. The first source that fails is
+# raised as a SourceError; the sources not started yet are cancelled.
+def load_sources(client, sources, directory=None, max_workers=MAX_WORKERS, sleep=time.sleep, clock=time.monotonic):
+    directory = directory or os.path.dirname(snapshot.SNAPSHOT_PATH) or "."
+    loaded = [None] * len(sources)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources))), thread_name_prefix="sheet-loader") as pool:
+        futures = {pool.submit(load_source, client, source, directory, sleep, clock): i for i, source in enumerate(sources)}
+        try:
+            for future in as_completed(futures):
+                loaded[futures[future]] = future.result()
+        except SourceError:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return combine(loaded)
+
+
+# Sources from their snapshots only, when there is no client at all
+def load_snapshots(sources, directory=None):
+    directory = directory or os.path.dirname(snapshot.SNAPSHOT_PATH) or "."
+    return combine([_tag(snapshot.read_snapshot(source.snapshot_path(directory)), source) for source in sources])
+
+
+# One frame with the columns of all sheets; the column types are settled again because a
+# column missing from one sheet comes back as NaN
+def combine(loaded):
+    return snapshot.type_columns(pd.concat(loaded, ignore_index=True))
@@ -0,0 +1,331 @@
+# utils/static_site.py
+#
+# Pre-renders the dashboard into a static bundle that any static host or CDN can serve:
+#
+#   site/index.html                                  page with the summaries and a small viewer script
+#   site/plotly.min.js                               plotly.js of the installed plotly version
+#   site/figures/team/<kind>.<hash>.json.gz          Team tab figures
+#   site/figures/players/<id>/<kind>.<hash>.json.gz  Player tab figures of every player
+#   site/manifest.json                               hashes and figure paths of the last build
+#
+# Figures are named by the hash of the rows they are built from. A rebuild only regenerates the
+# figures of players whose rows changed (and the team figures when anything changed) and removes
+# the files no longer listed. Run from the repository root:
+#
+#   python -m utils.static_site --output site
+#   python -m utils.static_site --output site --snapshot snapshot/Bowling-liga.parquet --full
+import argparse
+import gzip
+import hashlib
+import html
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+import plotly
+import plotly.offline
+
+from . import data_prep
+from . import frames
+from . import graph_player
+from . import graph_team
+
+# Bump when the generators or the page change, so the next build regenerates every figure
+BUILD_FORMAT = 1
+
+# Same figures and kinds as the Team and Player tabs of app.py
+TEAM_FIGURES = {
+    "absolute-game-score": lambda data: graph_team.generate_absolute_game_score_plot(data["df"], data["color_dict"]),
+    "total-score-dist": lambda data: graph_team.generate_total_score_dist(data["df"], 10),
+    "avg-min-max": lambda data: graph_team.generate_avg_min_max_plot(data["avg_min_max_scores"]),
+    "result-distribution": lambda data: graph_team.generate_result_distribution_pie(data["round_results_percentage"]),
+}
+
+PLAYER_FIGURES = {
+    "strikes-spares": lambda data, player: graph_player.generate_combined_strikes_and_spares_evolution_plot(
+        data["df"], player, data["player_index"]),
+    "player-score-dist": lambda data, player: graph_player.generate_player_score_dist(data["df"], player, 10, data["player_index"]),
+    "position-over-time": lambda data, player: graph_player.generate_position_over_time_plot(data["df"], player, data["player_index"]),
+    "round-distribution": lambda data, player: graph_player.generate_player_result_pie(
+        frames.percentages(data["ranges"].result_counts(player)), player),
+}
+
+# Columns a player's figures are built from; Rank also changes when another player's game at
+# the same position changes, so it is part of the hash
+PLAYER_COLUMNS = ['absolute_game_position', 'Skóre 10. kolo', 'Num Strikes', 'Num Spares', 'Rank']
+
+
+def _digest(*parts):
+    sha = hashlib.sha1()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+    return sha.hexdigest()
+
+
+# Hash of everything the player's figures show
+def player_hash(data, player):
+    start, stop = data["player_index"][player]
+    rows = data["df"].iloc[start:stop][PLAYER_COLUMNS]
+    return _digest(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes(),
+                   data["frame_matrix"][start:stop].tobytes())
+
+
+# Directory name of a player; names may hold spaces and diacritics
+def player_id(player):
+    return _digest(player)[:12]
+
+
+def _write_atomic(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+# Figures as gzipped plotly JSON; mtime=0 keeps the bytes of an unchanged figure identical
+def _write_figures(directory, relative_dir, builders, build_hash, *args):
+    paths = {}
+    for kind, build in builders.items():
+        relative = f"{relative_dir}/{kind}.{build_hash[:12]}.json.gz"
+        _write_atomic(os.path.join(directory, relative), gzip.compress(build(*args).to_json().encode('utf-8'), mtime=0))
+        paths[kind] = relative
+    return paths
+
+
+def _exists(directory, paths):
+    return all(os.path.exists(os.path.join(directory, path)) for path in paths.values())
+
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, "manifest.json"), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _player_overview(data, player):
+    stats = data["ranges"].player_stats(player)
+    return {
+        "best": stats["best"],
+        "worst": stats["worst"],
+        "average": None if not stats["games"] else round(stats["average"], 0),
+        "deviation": None if not stats["games"] else round(stats["variance"] ** 0.5, 1),
+        "games": stats["games"],
+    }
+
+
+# Build or update the bundle in `directory` from prepared data. With `full` every figure is
+# regenerated, otherwise figures whose hash is unchanged are kept.
+def build(data, directory, full=False):
+    start = time.perf_counter()
+    previous = None if full else read_manifest(directory)
+    if previous is not None and (previous.get("format") != BUILD_FORMAT or previous.get("plotly") != plotly.__version__):
+        previous = None
+    previous_players = previous["players"] if previous else {}
+
+    players = {}
+    built = skipped = 0
+    for player in data["player_index"]:
+        build_hash = player_hash(data, player)
+        old = previous_players.get(player)
+        if old is not None and old["hash"] == build_hash and _exists(directory, old["figures"]):
+            figures = old["figures"]
+            skipped += 1
+        else:
+            figures = _write_figures(directory, f"figures/players/{player_id(player)}", PLAYER_FIGURES, build_hash, data, player)
+            built += 1
+        players[player] = {"id": player_id(player), "hash": build_hash, "figures": figures,
+                           "overview": _player_overview(data, player)}
+
+    # The team figures show every row, they change whenever a player's rows or colors change
+    team_hash = _digest(*(players[player]["hash"] for player in sorted(players)), json.dumps(data["color_dict"], sort_keys=True))
+    old_team = previous["team"] if previous else None
+    if old_team is not None and old_team["hash"] == team_hash and _exists(directory, old_team["figures"]):
+        team = old_team
+    else:
+        team = {"hash": team_hash, "figures": _write_figures(directory, "figures/team", TEAM_FIGURES, team_hash, data)}
+
+    plotly_path = os.path.join(directory, "plotly.min.js")
+    if previous is None or not os.path.exists(plotly_path):
+        _write_atomic(plotly_path, plotly.offline.get_plotlyjs().encode('utf-8'))
+
+    manifest = {
+        "format": BUILD_FORMAT,
+        "plotly": plotly.__version__,
+        "generated_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "team": team,
+        "players": players,
+    }
+    _write_atomic(os.path.join(directory, "index.html"), render_page(data, manifest).encode('utf-8'))
+    _write_atomic(os.path.join(directory, "manifest.json"), json.dumps(manifest, indent=1, ensure_ascii=False).encode('utf-8'))
+    removed = _remove_unlisted(directory, manifest)
+    return {"players_built": built, "players_skipped": skipped, "team_built": team is not old_team,
+            "files_removed": removed, "seconds": time.perf_counter() - start}
+
+
+# Delete figure files of earlier builds that the manifest no longer lists
+def _remove_unlisted(directory, manifest):
+    listed = set(manifest["team"]["figures"].values())
+    for player in manifest["players"].values():
+        listed.update(player["figures"].values())
+    removed = 0
+    figures_dir = os.path.join(directory, "figures")
+    for root, dirs, files in os.walk(figures_dir, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.relpath(path, directory).replace(os.sep, '/') not in listed:
+                os.remove(path)
+                removed += 1
+        if root != figures_dir and not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+
+PAGE = """<!DOCTYPE html>
+<html lang="cs">
+<head>
+<meta charset="utf-8">
+<title>Bowling</title>
+<script src="plotly.min.js"></script>
+<style>
+  body {{ background-color: #1A1A2E; color: white; font-family: sans-serif; padding: 20px; margin: 0; }}
+  h1 {{ text-align: center; font-size: 3.5em; margin-bottom: 20px; }}
+  .box {{ background-color: #2B3E50; font-size: 1.1em; padding: 15px 20px; border-radius: 10px; margin-bottom: 20px; }}
+  .box span {{ margin-right: 15px; }}
+  .leaderboard {{ display: flex; flex-wrap: wrap; justify-content: space-around; }}
+  .leaderboard td {{ padding: 2px 8px; }}
+  #graphs {{ display: flex; flex-wrap: wrap; justify-content: space-around; }}
+  #graphs div {{ width: 48%; height: 450px; }}
+</style>
+</head>
+<body>
+<h1>Bowling</h1>
+<div style="text-align: center; margin-bottom: 30px">
+  <div style="font-size: 1.2em; margin-bottom: 5px">Last Game Data</div>
+  <div class="box">{last_game}</div>
+</div>
+<div style="padding: 10px 0">
+  <label for="view">Filter By:</label>
+  <select id="view"><option value="">Team</option>{player_options}</select>
+</div>
+<div class="box leaderboard" id="leaderboard">{leaderboard}</div>
+<div class="box" id="overview"></div>
+<div id="graphs"><div id="graph-0"></div><div id="graph-1"></div><div id="graph-2"></div><div id="graph-3"></div></div>
+<p style="color: gray">Generated {generated_at}</p>
+<script>
+var MANIFEST = {manifest};
+var TEAM_OVERVIEW = {team_overview};
+
+// Figures are gzipped JSON; the browser inflates them itself
+function loadFigure(path) {{
+    return fetch(path).then(function (response) {{
+        return new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).json();
+    }});
+}}
+
+function fixed(value) {{
+    return value === null ? '-' : value.toFixed(1);
+}}
+
+function spans(items) {{
+    return items.map(function (text) {{
+        var span = document.createElement('span');
+        span.textContent = text;
+        return span;
+    }});
+}}
+
+function show(player) {{
+    var entry = player ? MANIFEST.players[player] : MANIFEST.team;
+    var overview = document.getElementById('overview');
+    var o = player ? entry.overview : TEAM_OVERVIEW;
+    overview.replaceChildren.apply(overview, spans(player
+        ? ['Selected Player: ' + player, 'Best round: ' + o.best, 'Worst round: ' + o.worst, 'Average score: ' + fixed(o.average),
+           'Std. deviation: ' + fixed(o.deviation), 'Games: ' + o.games]
+        : ['Team Overview: Duto Duto', 'Top team score: ' + o.top_player + ' - ' + o.top_score + ' points',
+           'Worst team score: ' + o.worst_player + ' - ' + o.worst_score + ' points', 'Average team score: ' + fixed(o.average)]));
+    document.getElementById('leaderboard').style.display = player ? 'none' : 'flex';
+    Object.keys(entry.figures).forEach(function (kind, i) {{
+        loadFigure(entry.figures[kind]).then(function (figure) {{
+            Plotly.react('graph-' + i, figure.data, figure.layout);
+        }});
+    }});
+}}
+
+document.getElementById('view').addEventListener('change', function (event) {{ show(event.target.value); }});
+show('');
+</script>
+</body>
+</html>
+"""
+
+
+def _last_game_html(data):
+    max_sum_score = data["max_sum_score"]
+    max_score = data["max_score"]
+    top_strikes = data["top_strikes"]
+    lines = [
+        [f"Venue: {data['venue']}", f"Date: {data['date']}", f"Number of rounds: {data['num_rounds']}"],
+        [f"Top player: {max_sum_score['Hráč']} - {max_sum_score['Skóre 10. kolo']} points",
+         f"Top round: {max_score['Hráč']} - {max_score['Skóre 10. kolo']} points",
+         f"Average team score: {data['team_avg_score']:.2f}",
+         f"Top strikes: {top_strikes['Hráč']} - {top_strikes['Num Strikes']} strikes"],
+    ]
+    return "".join("<div>" + "".join(f"<span>{html.escape(text)}</span>" for text in line) + "</div>" for line in lines)
+
+
+def _leaderboard_html(data):
+    columns = []
+    for ranking in data["leaderboard_snapshot"].values():
+        rows = "".join(f"<tr><td>{row['rank']}.</td><td>{html.escape(str(row['player']))}</td>"
+                       f"<td style=\"text-align: right\">{row['value']}</td></tr>" for row in ranking["rows"])
+        columns.append(f"<div><div style=\"font-weight: bold\">{html.escape(ranking['title'])}</div><table>{rows}</table></div>")
+    return "".join(columns)
+
+
+# JSON for an inline <script>; "</" would end the script element early
+def _script_json(value):
+    return json.dumps(value, ensure_ascii=False, default=str).replace("</", "<\\/")
+
+
+def render_page(data, manifest):
+    team = data["team_summary"]
+    team_overview = {"top_player": team["top_player"], "top_score": int(team["top_score"]),
+                     "worst_player": team["worst_player"], "worst_score": int(team["worst_score"]),
+                     "average": round(float(team["average"]), 0)}
+    viewer = {"team": manifest["team"], "players": {player: {"figures": entry["figures"], "overview": entry["overview"]}
+                                                    for player, entry in manifest["players"].items()}}
+    options = "".join(f"<option value=\"{html.escape(str(player), quote=True)}\">{html.escape(str(player))}</option>"
+                      for player in data["players"])
+    return PAGE.format(last_game=_last_game_html(data), player_options=options, leaderboard=_leaderboard_html(data),
+                       generated_at=html.escape(manifest["generated_at"]), manifest=_script_json(viewer),
+                       team_overview=_script_json(team_overview))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render the dashboard into a static bundle")
+    parser.add_argument("--output", default="site", help="bundle directory, updated in place")
+    parser.add_argument("--snapshot", help="read this Parquet snapshot instead of the Google Sheet")
+    parser.add_argument("--full", action="store_true", help="regenerate every figure")
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        from . import snapshot
+        raw = snapshot.read_snapshot(args.snapshot)
+    else:
+        from . import sheets
+        raw = sheets.load_raw_data()
+    data = data_prep.prepare_data(raw)
+    result = build(data, args.output, full=args.full)
+    print(f"{result['players_built']} players rendered, {result['players_skipped']} unchanged, "
+          f"team {'rendered' if result['team_built'] else 'unchanged'}, {result['files_removed']} stale files removed "
+          f"in {result['seconds']:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
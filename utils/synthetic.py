@@ -0,0 +1,98 @@
+# utils/synthetic.py
+import numpy as np
+import pandas as pd
+
+FRAMES = 10
+VENUES = ["Bowling Strahov", "Bowling Arena", "Kuželna Praha"]
+
+
+# Roll every frame of n_games games at once. Returns the first and second ball of frames 1-10
+# (second is 0 after a strike) and the two bonus balls of the 10th frame.
+def _roll_games(rng, strike_prob, spare_prob):
+    n_games = len(strike_prob)
+    strike = rng.random((n_games, FRAMES)) < strike_prob[:, None]
+    spare = ~strike & (rng.random((n_games, FRAMES)) < spare_prob[:, None])
+
+    first = np.where(strike, 10, rng.integers(0, 10, (n_games, FRAMES)))
+    # For open frames the second ball knocks down fewer than the pins left standing
+    second_open = (rng.random((n_games, FRAMES)) * (10 - first)).astype(int)
+    second = np.where(strike, 0, np.where(spare, 10 - first, second_open))
+
+    # Bonus balls of the 10th frame, a fresh rack after a strike or spare
+    bonus_strike = rng.random((n_games, 2)) < strike_prob[:, None]
+    bonus = np.where(bonus_strike, 10, rng.integers(0, 10, (n_games, 2)))
+    after_open_bonus = (rng.random(n_games) * (11 - bonus[:, 0])).astype(int)
+    bonus[:, 1] = np.where(bonus[:, 0] == 10, bonus[:, 1], after_open_bonus)
+    return first, second, strike, spare, bonus
+
+
+# Ten-pin scoring of rolled games, vectorized over games
+def _score_games(first, second, strike, spare, bonus):
+    tenth_strike = strike[:, 9]
+    tenth_spare = spare[:, 9]
+    # Balls of the 10th frame: t1, t2 and t3 (0 when not earned)
+    t1 = first[:, 9]
+    t2 = np.where(tenth_strike, bonus[:, 0], second[:, 9])
+    t3 = np.where(tenth_strike, bonus[:, 1], np.where(tenth_spare, bonus[:, 0], 0))
+
+    total = t1 + t2 + t3
+    for f in range(9):
+        next_first = first[:, f + 1] if f + 1 < 9 else t1
+        if f + 1 < 9:
+            after_next = np.where(strike[:, f + 1], first[:, f + 2] if f + 2 < 9 else t1, second[:, f + 1])
+        else:
+            after_next = t2
+        frame = first[:, f] + second[:, f]
+        frame = frame + np.where(strike[:, f], next_first + after_next, np.where(spare[:, f], next_first, 0))
+        total = total + frame
+    return total
+
+
+# DataFrame in the schema of the "Bowling-liga" sheet.
+# Every player attends a game day with probability `attendance` (at least two players always do)
+# and plays `games_per_day` games there.
+def generate_sheet(players=8, game_days=50, games_per_day=3, attendance=0.8, seed=0,
+                   start_date="2023-01-06"):
+    rng = np.random.default_rng(seed)
+    names = np.array([f"Hráč {i + 1}" for i in range(players)])
+    strike_skill = rng.uniform(0.08, 0.35, players)
+    spare_skill = rng.uniform(0.25, 0.55, players)
+
+    present = rng.random((game_days, players)) < attendance
+    present[:, :2] = present[:, :2] | (present.sum(axis=1) < 2)[:, None]
+    day_idx, player_idx = np.nonzero(present)
+
+    # One row per (day, player, game), ordered like the sheet: by day, then game, then player
+    n_pairs = len(day_idx)
+    game_no = np.tile(np.arange(1, games_per_day + 1), n_pairs)
+    day_idx = np.repeat(day_idx, games_per_day)
+    player_idx = np.repeat(player_idx, games_per_day)
+    order = np.lexsort((player_idx, game_no, day_idx))
+    day_idx, player_idx, game_no = day_idx[order], player_idx[order], game_no[order]
+
+    first, second, strike, spare, bonus = _roll_games(rng, strike_skill[player_idx], spare_skill[player_idx])
+    score = _score_games(first, second, strike, spare, bonus)
+
+    labels = (first + second).astype(object)
+    labels[spare] = 'Spare'
+    labels[strike] = 'Strike'
+
+    dates = pd.Timestamp(start_date) + pd.to_timedelta(7 * np.arange(game_days), unit='D')
+    venues = np.array(VENUES)[rng.integers(0, len(VENUES), game_days)]
+
+    columns = {
+        'Hráč': names[player_idx],
+        'Den': dates.strftime('%Y-%m-%d').to_numpy()[day_idx],
+        'Podnik': venues[day_idx],
+        'Pořadové č. hry': game_no,
+    }
+    for f in range(FRAMES):
+        columns[f'{f + 1}. kolo'] = labels[:, f]
+    columns['Skóre 10. kolo'] = score
+    return pd.DataFrame(columns)
+
+
+# The same rows as gspread's get_all_records() returns them, e.g. for a stand-in Sheets client
+def generate_records(players=8, game_days=50, games_per_day=3, attendance=0.8, seed=0,
+                     start_date="2023-01-06"):
+    return generate_sheet(players, game_days, games_per_day, attendance, seed, start_date).to_dict('records')
@@ -0,0 +1,4 @@
+# Production entry point for a WSGI server: gunicorn -c gunicorn.conf.py wsgi:server
+from app import app
+
+server = app.server